@@ -16,9 +16,22 @@ Features:
 import os
 from pathlib import Path
 import re
+import json
+import logging
+import pickle
+import shutil
+import hashlib
+import tempfile
+import sqlite3
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import time
+import threading
+import uuid
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
 import os
 
@@ -26,180 +39,345 @@ load_dotenv()
 
 api_key = os.getenv("OPENAI_API_KEY")
 
+import numpy as np
+import faiss
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_groq import ChatGroq
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.tools import DuckDuckGoSearchRun
-from PyPDF2 import PdfReader
+from langchain_core.embeddings import Embeddings
+from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+from conversation import looks_like_follow_up
+from crawler import HTML_PARSER, CrawlerHttpClient, crawl, fetch_and_parse_page, is_valid_url
+from embedding_backend import quantized_onnx_file
+from hybrid_store import DIGIT_GROUP_RE, HybridFAISS, IndexRegistry, clone_vector_store, lexical_tokens
+from pdf_extraction import available_backend, count_pages, extract_page_range
+from process_pools import importable_main, spawn_context
+from vector_index import (
+    INDEX_TYPE, build_ann_index, choose_index_type,
+    read_faiss_index, supports_removal, use_index_mmap
+)
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    TOKEN_ENCODING = None
 
 # ============================================================================
 # 1. WEB SEARCH & INTERNET FUNCTIONS (ENHANCED - ChatGPT MODE!)
 # ============================================================================
 
-def perform_comprehensive_web_search(query: str, num_results: int = 5) -> dict:
-    """Perform comprehensive web search and extract content."""
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "900"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+WEB_FETCH_PAGES = int(os.getenv("WEB_FETCH_PAGES", "0"))
+WEB_FETCH_BUDGET = float(os.getenv("WEB_FETCH_BUDGET", "3"))
+WEB_PAGE_EXCERPT_CHARS = 1500
+
+
+class SearchCache:
+    """
+    Process-wide TTL + LRU cache of web search results.
+    Concurrent misses for the same key share one upstream call (single flight).
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def get_or_fetch(self, key: str, fetch) -> dict:
+        """Return a fresh cached result for key, joining or starting the upstream fetch if needed."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                return entry[1]
+            
+            future = self.in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self.in_flight[key] = future
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            result = fetch()
+        except Exception as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+        
+        with self.lock:
+            # Failures are shared with waiters but not cached
+            if result.get("success"):
+                self.entries[key] = (time.monotonic() + self.ttl, result)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            del self.in_flight[key]
+        
+        future.set_result(result)
+        return result
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_cache() -> SearchCache:
+    """Search cache shared by every session in this process."""
+    return SearchCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL)
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_wrapper() -> DuckDuckGoSearchAPIWrapper:
+    """Reuse one DuckDuckGo client instead of building one per query."""
+    return DuckDuckGoSearchAPIWrapper()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different spellings share a cache entry."""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+def perform_comprehensive_web_search(query: str, num_results: int = 5, fetch_pages: int = 0,
+                                     fetch_budget: float = WEB_FETCH_BUDGET) -> dict:
+    """
+    Perform comprehensive web search and extract content (cached per normalized query).
+    Returns up to num_results structured results; the top fetch_pages result pages
+    are also downloaded in parallel within fetch_budget seconds.
+    """
+    return get_search_cache().get_or_fetch(
+        f"{normalize_query(query)}|{num_results}|{fetch_pages}",
+        lambda: search_web(query, num_results, fetch_pages, fetch_budget)
+    )
+
+
+def search_web(query: str, num_results: int = 5, fetch_pages: int = 0,
+               fetch_budget: float = WEB_FETCH_BUDGET) -> dict:
+    """Run an uncached DuckDuckGo search returning title/url/snippet records."""
     try:
-        search = DuckDuckGoSearchRun()
-        results = search.run(query)
+        raw_results = get_search_wrapper().results(query, max_results=num_results)
+        
+        results = []
+        seen_urls = set()
+        for item in raw_results:
+            url = item.get("link", "")
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            results.append({
+                "title": item.get("title", "").strip(),
+                "url": url,
+                "snippet": item.get("snippet", "").strip()
+            })
         
         if not results:
-            return {"success": False, "content": "", "sources": []}
+            return {"success": False, "content": "", "sources": [], "results": []}
+        
+        if fetch_pages:
+            fetch_result_pages(results[:fetch_pages], fetch_budget)
         
         return {
             "success": True,
-            "content": results,
-            "sources": [{"title": query, "url": "Web Search Results"}]
+            "content": format_search_results(results),
+            "sources": [{"title": result["title"], "url": result["url"]} for result in results],
+            "results": results
         }
     except Exception as e:
-        return {"success": False, "content": str(e), "sources": []}
+        return {"success": False, "content": str(e), "sources": [], "results": []}
 
 
-def extract_web_content(search_results: str) -> list:
-    """Extract structured information from web search results."""
+def fetch_result_pages(results: list, budget: float):
+    """Download result pages in parallel, adding "page_text" to those that finish within budget."""
+    executor = ThreadPoolExecutor(max_workers=max(len(results), 1))
+    futures = {
+        executor.submit(extract_text_from_url, result["url"], max(int(budget), 1)): result
+        for result in results
+    }
+    done, _ = wait(futures, timeout=budget)
+    
+    for future in done:
+        title, text = future.result()
+        if title is not None and text:
+            futures[future]["page_text"] = text[:WEB_PAGE_EXCERPT_CHARS]
+    
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def format_search_results(results: list) -> str:
+    """Render search results as compact, deduplicated numbered snippets for prompts."""
+    blocks = []
+    seen_snippets = set()
+    
+    for result in results:
+        snippet_key = normalize_query(result["snippet"])
+        if not result["snippet"] or snippet_key in seen_snippets:
+            continue
+        seen_snippets.add(snippet_key)
+        
+        text = result["snippet"]
+        if result.get("page_text"):
+            text = f"{text}\n{result['page_text']}"
+        blocks.append(f"[{len(blocks) + 1}] {result['title']} ({result['url']})\n{text}")
+    
+    return "\n\n".join(blocks)
+
+
+WEB_CONTEXT_TOKEN_BUDGET = int(os.getenv("WEB_CONTEXT_TOKEN_BUDGET", "600"))
+SNIPPET_DUPLICATE_THRESHOLD = 0.7
+
+SENTENCE_SPLIT_RE = re.compile(r'[.!?;]\s+')
+BRACKETS_RE = re.compile(r'\[.*?\]')
+WHITESPACE_RE = re.compile(r'\s+')
+WORD_RE = re.compile(r'\w+')
+SNIPPET_BLOCKLIST_RE = re.compile(
+    r'click here|read more|sponsored|advertisement|cookie',
+    re.IGNORECASE
+)
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, else estimate about four characters per token."""
+    if TOKEN_ENCODING is not None:
+        return len(TOKEN_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word n-gram shingles used for near-duplicate detection."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def extract_web_content(search_results: str, question: str = None, embeddings=None,
+                        token_budget: int = WEB_CONTEXT_TOKEN_BUDGET) -> list:
+    """
+    Extract clean, non-duplicate sentences from web search results.
+    Sentences are ranked by relevance to the question (embedding similarity when
+    embeddings are given, word overlap otherwise) and trimmed to token_budget.
+    """
     points = []
-    sentences = re.split(r'[.!?;]\s+', search_results)
+    kept_shingles = []
     
-    for sentence in sentences:
+    for sentence in SENTENCE_SPLIT_RE.split(search_results):
         sentence = sentence.strip()
         
-        if len(sentence) < 20 or len(sentence) > 400:
+        if len(sentence) < 20 or len(sentence) > 400 or SNIPPET_BLOCKLIST_RE.search(sentence):
             continue
         
-        if any(pattern in sentence.lower() for pattern in 
-               ['click here', 'read more', 'sponsored', 'advertisement', 'cookie']):
+        sentence = WHITESPACE_RE.sub(' ', BRACKETS_RE.sub('', sentence)).strip()
+        if len(sentence) <= 20:
             continue
         
-        sentence = re.sub(r'\[.*?\]', '', sentence)
-        sentence = re.sub(r'\s+', ' ', sentence)
+        sentence_shingles = shingles(sentence)
+        if any(
+            len(sentence_shingles & other) / len(sentence_shingles | other) >= SNIPPET_DUPLICATE_THRESHOLD
+            for other in kept_shingles
+        ):
+            continue
         
-        if sentence and len(sentence) > 20:
-            points.append(sentence)
+        kept_shingles.append(sentence_shingles)
+        points.append(sentence)
+    
+    if question and points:
+        if embeddings is not None:
+            sentence_vectors = np.asarray(embeddings.embed_documents(points), dtype=np.float32)
+            question_vector = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+            scores = sentence_vectors @ question_vector
+        else:
+            question_words = set(WORD_RE.findall(question.lower()))
+            scores = np.array([len(question_words & set(WORD_RE.findall(p.lower()))) for p in points])
+        
+        # Stable sort keeps search-result order among equally relevant sentences
+        points = [points[i] for i in np.argsort(-scores, kind="stable")]
+    
+    selected = []
+    used_tokens = 0
+    for point in points:
+        tokens = count_tokens(point)
+        if used_tokens + tokens > token_budget:
+            continue
+        selected.append(point)
+        used_tokens += tokens
+    
+    return selected
+
+
+def build_web_context(web_results: dict, question: str, embeddings=None) -> list:
+    """Turn structured search results into ranked bullet points plus a source list for prompts."""
+    texts = []
+    for result in web_results.get("results", []):
+        texts.append(result["snippet"])
+        if result.get("page_text"):
+            texts.append(result["page_text"])
+    
+    points = extract_web_content(". ".join(texts), question, embeddings)
+    if not points:
+        return [web_results["content"]]
     
-    return points[:10]
+    sources = "\n".join(f"- {source['title']}: {source['url']}" for source in web_results["sources"])
+    return [f"• {point}" for point in points] + [f"Sources:\n{sources}"]
 
 
 # ============================================================================
 # 2. WEB CRAWLING FUNCTIONS
 # ============================================================================
 
-def is_valid_url(url: str) -> bool:
-    """Validate URL format."""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except:
-        return False
-
-
-def is_allowed_url(url: str, base_domain: str) -> bool:
-    """Check if URL belongs to the same domain."""
-    try:
-        parsed_url = urlparse(url)
-        parsed_base = urlparse(base_domain)
-        return parsed_url.netloc == parsed_base.netloc
-    except:
-        return False
-
-
-def clean_text(text: str) -> str:
-    """Clean extracted text from HTML."""
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[^\w\s.,:;!?()-]', '', text)
-    return text.strip()
+@st.cache_resource(show_spinner=False)
+def get_http_client() -> CrawlerHttpClient:
+    """Process-wide HTTP client shared by every crawl."""
+    return CrawlerHttpClient()
 
 
 def extract_text_from_url(url: str, timeout: int = 10) -> tuple:
     """Extract text content from a webpage."""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
+        page = fetch_and_parse_page(url, get_http_client(), timeout=timeout)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        title = soup.title.string if soup.title else "Untitled"
-        text = soup.get_text()
-        text = clean_text(text)
-        
-        if not text.strip():
+        if not page["text"].strip():
             return None, None
         
-        return title, text
+        return page["title"], page["text"]
         
     except Exception as e:
         return None, f"Error fetching {url}: {str(e)}"
 
 
 def crawl_website(base_url: str, max_pages: int = 10, max_depth: int = 2) -> dict:
-    """Crawl a website and extract text from pages."""
+    """Crawl a website concurrently (breadth-first) and extract text from pages."""
     if not is_valid_url(base_url):
         return {"error": "Invalid URL format"}
     
-    crawled_pages = {}
-    visited_urls = set()
-    to_visit = [(base_url, 0)]
-    
     progress_placeholder = st.empty()
     status_placeholder = st.empty()
     
-    while to_visit and len(crawled_pages) < max_pages:
-        current_url, depth = to_visit.pop(0)
-        
-        if current_url in visited_urls or depth > max_depth:
-            continue
-        
-        visited_urls.add(current_url)
-        
-        progress = len(crawled_pages) / max_pages
-        progress_placeholder.progress(progress)
-        status_placeholder.write(f"📄 Crawling ({len(crawled_pages)}/{max_pages}): {current_url[:60]}...")
-        
-        title, content = extract_text_from_url(current_url)
-        
-        if content and not isinstance(content, str) or not content.startswith("Error"):
-            crawled_pages[current_url] = {
-                "title": title,
-                "content": content,
-                "depth": depth
-            }
-            
-            if depth < max_depth and len(crawled_pages) < max_pages:
-                try:
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
-                    response = requests.get(current_url, headers=headers, timeout=5)
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    for link in soup.find_all('a', href=True):
-                        url = link['href']
-                        absolute_url = urljoin(current_url, url)
-                        
-                        if (is_valid_url(absolute_url) and 
-                            is_allowed_url(absolute_url, base_url) and
-                            absolute_url not in visited_urls):
-                            
-                            to_visit.append((absolute_url, depth + 1))
-                            
-                            if len(crawled_pages) >= max_pages:
-                                break
-                
-                except:
-                    pass
-        
-        time.sleep(0.5)
+    def report(crawled: int, total: int, url: str):
+        progress_placeholder.progress(crawled / total)
+        status_placeholder.write(f"📄 Crawled ({crawled}/{total}): {url[:60]}...")
+    
+    crawled_pages = crawl(
+        base_url,
+        get_http_client(),
+        max_pages=max_pages,
+        max_depth=max_depth,
+        progress_callback=report
+    )
     
     progress_placeholder.empty()
     status_placeholder.empty()
@@ -559,106 +737,1352 @@ def load_and_validate_groq_key():
     return api_key
 
 
-@st.cache_resource
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "").strip()  # local copy of a compatible model
+EMBEDDING_MODEL_SOURCE = EMBEDDING_MODEL_PATH or EMBEDDING_MODEL_NAME
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()  # torch, onnx
+EMBED_ONNX_QUANTIZATION = os.getenv("EMBED_ONNX_QUANTIZATION", "avx2").lower()  # arm64, avx2, avx512, avx512_vnni, none
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_STREAM_CHUNKS = int(os.getenv("EMBED_STREAM_CHUNKS", "512"))
+EMBED_MULTI_PROCESS = os.getenv("EMBED_MULTI_PROCESS", "").lower() in ("1", "true", "yes")
+EMBED_MULTI_PROCESS_MIN_CHUNKS = int(os.getenv("EMBED_MULTI_PROCESS_MIN_CHUNKS", "1000"))
+EMBED_WARMUP = os.getenv("EMBED_WARMUP", "").lower() in ("1", "true", "yes")
+
+# Identifies the vectors a model/backend produces: int8 ONNX output is close to, but not
+# the same as, PyTorch output, so cached embeddings and indexes must not be mixed
+EMBEDDING_MODEL_ID = "|".join(
+    [EMBEDDING_MODEL_SOURCE, EMBED_BACKEND]
+    + ([EMBED_ONNX_QUANTIZATION] if EMBED_BACKEND == "onnx" else [])
+)
+
+
+def embedding_model_kwargs() -> dict:
+    """SentenceTransformer constructor kwargs for the configured embedding backend."""
+    kwargs = {"device": "cpu"}
+    
+    if EMBED_BACKEND == "onnx":
+        kwargs["backend"] = "onnx"
+        if EMBED_ONNX_QUANTIZATION != "none":
+            kwargs["model_kwargs"] = {
+                "file_name": quantized_onnx_file(EMBEDDING_MODEL_SOURCE, EMBED_ONNX_QUANTIZATION)
+            }
+    
+    return kwargs
+
+
+@st.cache_resource(show_spinner=False)
+def get_startup_times() -> dict:
+    """Seconds each model took to initialize in this process."""
+    return {}
+
+
+@st.cache_resource(show_spinner=False)
 def initialize_groq(api_key: str):
-    """Initialize Groq LLM and embeddings."""
+    """Initialize the Groq LLM client."""
     try:
-        embeddings = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True}
-        )
-        
+        started = time.perf_counter()
         llm = ChatGroq(
             groq_api_key=api_key,
             model="llama-3.3-70b-versatile",
             temperature=0.7,
             max_tokens=2048,
         )
-        
-        return embeddings, llm
+        get_startup_times()["llm"] = time.perf_counter() - started
+        logger.info("Groq client ready in %.2fs", get_startup_times()["llm"])
+        return llm
         
     except Exception as e:
         st.error(f"❌ Failed to initialize Groq: {str(e)}")
         st.stop()
 
 
+class LazyEmbeddings(Embeddings):
+    """
+    Embeddings that load the sentence-transformers model on first use, or in the
+    background via warm(), so sessions that never embed never pay for the model.
+    """
+
+    def __init__(self, startup_times: dict):
+        self.startup_times = startup_times
+        self._model = None
+        self.warming = False
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> HuggingFaceEmbeddings:
+        if self._model is None:
+            with self.lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    self._model = HuggingFaceEmbeddings(
+                        model_name=EMBEDDING_MODEL_SOURCE,
+                        model_kwargs=embedding_model_kwargs(),
+                        encode_kwargs={"normalize_embeddings": True, "batch_size": EMBED_BATCH_SIZE}
+                    )
+                    self.startup_times["embeddings"] = time.perf_counter() - started
+                    logger.info(
+                        "Embedding model %s loaded in %.2fs", EMBEDDING_MODEL_ID, self.startup_times["embeddings"]
+                    )
+        return self._model
+
+    def warm(self):
+        """Start loading the model on a background thread."""
+        if self.loaded or self.warming:
+            return
+        self.warming = True
+        threading.Thread(target=self.load, name="embedding-warmup", daemon=True).start()
+
+    def embed_documents(self, texts: list) -> list:
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        return self.load().embed_query(text)
+
+
+@st.cache_resource(show_spinner=False)
+def get_embeddings() -> LazyEmbeddings:
+    """Process-wide embedding model handle; the model itself loads on first use."""
+    return LazyEmbeddings(get_startup_times())
+
+
+class MultiProcessEmbeddings:
+    """Embeds large document batches on a persistent sentence-transformers process pool."""
+
+    def __init__(self, workers: int = None):
+        from sentence_transformers import SentenceTransformer
+        
+        self.model = SentenceTransformer(EMBEDDING_MODEL_SOURCE, **embedding_model_kwargs())
+        
+        # sentence-transformers spawns its workers right here; keep them from re-running app.py
+        with importable_main():
+            self.pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * (workers or os.cpu_count() or 1)
+            )
+
+    def embed_documents(self, texts: list) -> list:
+        vectors = self.model.encode(
+            texts,
+            pool=self.pool,
+            batch_size=EMBED_BATCH_SIZE,
+            normalize_embeddings=True
+        )
+        return vectors.tolist()
+
+
+@st.cache_resource(show_spinner=False)
+def get_multi_process_embeddings() -> MultiProcessEmbeddings:
+    """Start the embedding process pool once per server process."""
+    return MultiProcessEmbeddings()
+
+
 # =============================================================================
 # 6. PDF PROCESSING
 # =============================================================================
 
-def extract_text_from_pdf(pdf_file) -> str:
-    """Extract text from PDF."""
-    try:
-        pdf_reader = PdfReader(pdf_file)
-        
-        if not pdf_reader.pages:
-            raise ValueError("PDF file appears to be empty.")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+PDF_EXTRACT_BACKEND = available_backend(os.getenv("PDF_EXTRACT_BACKEND"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "10"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by all PDF uploads. Workers are spawned, so they never fork
+    Streamlit threads, and start from process_pools rather than re-running this script.
+    """
+    return ProcessPoolExecutor(
+        max_workers=PDF_EXTRACT_WORKERS,
+        mp_context=spawn_context()
+    )
+
+
+def retire_pdf_process_pool(pool: ProcessPoolExecutor):
+    """Replace the shared pool after a task overran its backstop, killing the stuck worker."""
+    # The executor has no public way to stop a busy worker, and forgets its processes on shutdown
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    get_pdf_process_pool.clear()
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+
+
+def spool_pdf(pdf_file, directory: str) -> str:
+    """Write an upload to a temporary file once, so workers read it by path instead of by copy."""
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.pdf")
+    with open(path, "wb") as f, pdf_file.getbuffer() as data:
+        f.write(data)
+    return path
+
+
+def iter_pdf_pages(pdf_files: list, errors: dict, progress_callback=None):
+    """
+    Yield (file_name, page_text) in document order while page ranges are extracted in parallel.
+    At most a few ranges are in flight, so memory stays bounded however large the upload is.
+    A range that overruns its backstop (PDF_PAGE_TIMEOUT per page, doubled to allow for
+    queueing) is dropped. Per-file failures are recorded in errors.
+    """
+    with tempfile.TemporaryDirectory(prefix="campus-buddy-pdf-") as spool_dir:
+        tasks = []
         
-        text = ""
-        for page in pdf_reader.pages:
+        for pdf_file in pdf_files:
             try:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-            except:
+                path = spool_pdf(pdf_file, spool_dir)
+                page_count = count_pages(path, PDF_EXTRACT_BACKEND)
+            except Exception as e:
+                errors[pdf_file.name] = f"Failed to process PDF: {str(e)}"
                 continue
-        
-        if not text.strip():
-            raise ValueError("No readable text found in PDF.")
-        
-        return text
-        
-    except Exception as e:
-        raise ValueError(f"Failed to process PDF: {str(e)}")
+            
+            if not page_count:
+                errors[pdf_file.name] = "PDF file appears to be empty."
+                continue
+            
+            for start in range(0, page_count, PDF_PAGES_PER_TASK):
+                tasks.append((pdf_file.name, path, start, min(start + PDF_PAGES_PER_TASK, page_count)))
+        
+        total_pages = sum(end - start for _, _, start, end in tasks)
+        pages_done = 0
+        has_text = set()
+        timed_out = set()
+        
+        pool = get_pdf_process_pool()
+        pending = deque()
+        remaining = deque(tasks)
+        
+        try:
+            while pending or remaining:
+                while remaining and len(pending) < PDF_EXTRACT_WORKERS * 2:
+                    name, path, start, end = remaining.popleft()
+                    future = pool.submit(
+                        extract_page_range, path, start, end, PDF_EXTRACT_BACKEND, PDF_PAGE_TIMEOUT
+                    )
+                    deadline = time.monotonic() + 2 * PDF_PAGE_TIMEOUT * (end - start) + 5
+                    pending.append((name, start, end, future, deadline))
+                
+                name, start, end, future, deadline = pending.popleft()
+                try:
+                    timeout = max(deadline - time.monotonic(), 0) if PDF_PAGE_TIMEOUT > 0 else None
+                    page_texts = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    logger.warning("PDF extraction of %s pages %d-%d timed out; skipped", name, start + 1, end)
+                    future.cancel()
+                    timed_out.add(name)
+                    page_texts = []
+                
+                pages_done += end - start
+                if progress_callback:
+                    progress_callback(pages_done, total_pages)
+                
+                for page_text in page_texts:
+                    if page_text.strip():
+                        has_text.add(name)
+                        yield name, page_text
+        except BrokenProcessPool:
+            get_pdf_process_pool.clear()
+            raise ValueError("PDF extraction workers crashed. Please try again.")
+        finally:
+            if timed_out:
+                retire_pdf_process_pool(pool)
+        
+        for name, _, _, _ in tasks:
+            if name not in has_text:
+                errors.setdefault(
+                    name,
+                    "PDF extraction timed out." if name in timed_out else "No readable text found in PDF."
+                )
+
+
+def iter_text_chunks(segments, text_splitter: RecursiveCharacterTextSplitter):
+    """
+    Yield (source_name, chunk) from (source_name, text) segments such as PDF pages.
+    The last chunk of each segment is carried into the next one from the same source,
+    so chunks still span page boundaries without holding whole documents.
+    """
+    current_source = None
+    carry = ""
+    
+    for source_name, text in segments:
+        if source_name != current_source:
+            if carry:
+                for chunk in text_splitter.split_text(carry):
+                    yield current_source, chunk
+            current_source, carry = source_name, text
+        else:
+            carry = f"{carry}\n{text}"
+        
+        chunks = text_splitter.split_text(carry)
+        for chunk in chunks[:-1]:
+            yield source_name, chunk
+        carry = chunks[-1] if chunks else ""
+    
+    if carry:
+        for chunk in text_splitter.split_text(carry):
+            yield current_source, chunk
 
 
-def split_and_embed_texts(texts_dict: dict, embeddings) -> FAISS:
-    """Split and embed texts."""
+def split_and_embed_texts(texts_dict, embeddings, vector_store: FAISS = None, manifest: dict = None,
+                          progress_callback=None) -> FAISS:
+    """
+    Split and embed texts, reusing cached chunk embeddings.
+    texts_dict may also be an iterable of (source_name, text) segments, which are consumed lazily.
+    Adds to vector_store when given and records each source's vector IDs in manifest.
+    """
     try:
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
             separators=["\n\n", "\n", " ", ""]
         )
+        segments = texts_dict.items() if isinstance(texts_dict, dict) else texts_dict
         
-        all_chunks = []
+        embedding_cache = get_embedding_cache()
+        progress_text = st.empty() if progress_callback is None else None
+        source_ids = {}
+        batch = []
+        chunk_count = hits = misses = 0
+        started = time.perf_counter()
         
-        for source_name, text in texts_dict.items():
-            chunks = text_splitter.split_text(text)
-            for chunk in chunks:
-                all_chunks.append(f"[Source: {source_name}]\n\n{chunk}")
+        def flush(batch: list, vector_store):
+            nonlocal hits, misses
+            
+            ingest_embeddings = embeddings
+            if EMBED_MULTI_PROCESS and chunk_count >= EMBED_MULTI_PROCESS_MIN_CHUNKS:
+                ingest_embeddings = get_multi_process_embeddings()
+            
+            # Embed the bare chunk so identical boilerplate hits the cache across sources
+            vectors, batch_hits, batch_misses = embedding_cache.embed_documents(
+                [chunk for _, chunk, _ in batch], ingest_embeddings
+            )
+            hits += batch_hits
+            misses += batch_misses
+            
+            text_embeddings = [
+                (f"[Source: {source_name}]\n\n{chunk}", vector)
+                for (source_name, chunk, _), vector in zip(batch, vectors)
+            ]
+            metadatas = [{"source": source_name} for source_name, _, _ in batch]
+            ids = [chunk_id for _, _, chunk_id in batch]
+            
+            if vector_store is None:
+                return HybridFAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+            
+            vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+            return vector_store
+        
+        # Stream chunk batches into the index so memory stays bounded and progress is visible
+        for source_name, chunk in iter_text_chunks(segments, text_splitter):
+            chunk_id = uuid.uuid4().hex
+            source_ids.setdefault(source_name, []).append(chunk_id)
+            batch.append((source_name, chunk, chunk_id))
+            chunk_count += 1
+            
+            if len(batch) >= EMBED_STREAM_CHUNKS:
+                vector_store = flush(batch, vector_store)
+                embedded = chunk_count
+                batch = []
+                
+                rate = embedded / max(time.perf_counter() - started, 1e-6)
+                if progress_callback:
+                    progress_callback(chunk_count, embedded)
+                else:
+                    progress_text.write(f"🧠 Embedded {embedded} chunks • {rate:.0f} chunks/sec")
+        
+        if batch:
+            vector_store = flush(batch, vector_store)
+            if progress_callback:
+                progress_callback(chunk_count, chunk_count)
         
-        if not all_chunks:
+        if not chunk_count:
             raise ValueError("No chunks created.")
         
-        st.write(f"📊 Created {len(all_chunks)} text chunks from {len(texts_dict)} source(s)")
-        vector_store = FAISS.from_texts(all_chunks, embeddings)
-        return vector_store
+        if progress_text is not None:
+            progress_text.empty()
+        rate = chunk_count / max(time.perf_counter() - started, 1e-6)
+        
+        st.write(
+            f"📊 Created {chunk_count} text chunks from {len(source_ids)} source(s) "
+            f"• 🧠 Embedding cache: {hits} hits, {misses} misses • ⚡ {rate:.0f} chunks/sec"
+        )
+        
+        if manifest is not None:
+            for source_name, chunk_ids in source_ids.items():
+                manifest.setdefault(source_name, {})["ids"] = chunk_ids
+        
+        return apply_index_type(vector_store)
             
     except Exception as e:
         raise ValueError(f"Text processing failed: {str(e)}")
 
 
 # =============================================================================
-# 7. ANSWER GENERATION (ChatGPT-LIKE!)
+# 7. VECTOR INDEX & EMBEDDING CACHES
 # =============================================================================
 
-def answer_with_internet_only(llm, user_question: str) -> tuple:
+INDEX_CACHE_DIR = Path(os.getenv("INDEX_CACHE_DIR", Path(__file__).parent / ".index_cache"))
+INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_MB", "1024")) * 1024 * 1024
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "300000"))  # ~1.6 KB each for MiniLM
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def apply_index_type(vector_store: FAISS, index_type: str = INDEX_TYPE) -> FAISS:
+    """
+    Rebuild a flat index as the configured ANN type once the corpus calls for it.
+    Vectors keep their positions, so the docstore mapping stays valid.
+    """
+    index = vector_store.index
+    target = choose_index_type(index.ntotal, index_type)
+    
+    if target == "flat" or not isinstance(index, faiss.IndexFlat):
+        return vector_store
+    
+    vector_store.index = build_ann_index(index.reconstruct_n(0, index.ntotal), target)
+    return vector_store
+
+
+def compute_corpus_fingerprint(source_hashes: dict) -> str:
+    """Fingerprint a corpus from its source hashes plus splitter and embedding settings."""
+    digest = hashlib.sha256()
+    digest.update(f"{EMBEDDING_MODEL_ID}|{CHUNK_SIZE}|{CHUNK_OVERLAP}|{INDEX_TYPE}".encode())
+    
+    for source_name in sorted(source_hashes):
+        digest.update(f"\n{source_name}\0{source_hashes[source_name]}".encode())
+    
+    return digest.hexdigest()
+
+
+def load_cached_index(fingerprint: str, embeddings):
+    """Load a cached FAISS index and its source manifest, or return (None, None)."""
+    index_dir = INDEX_CACHE_DIR / fingerprint
+    
+    if not (index_dir / "index.faiss").exists():
+        return None, None
+    
+    try:
+        index = read_faiss_index(index_dir / "index.faiss")
+        with open(index_dir / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        vector_store = HybridFAISS(embeddings, index, docstore, index_to_docstore_id)
+        vector_store.memory_mapped = use_index_mmap(index_dir / "index.faiss")
+        manifest = json.loads((index_dir / "manifest.json").read_text())
+        
+    except Exception:
+        return None, None
+    
+    # Older cache entries have no lexical index, or pickled it under __main__; it is then
+    # rebuilt from the docstore on first use
+    try:
+        with open(index_dir / "lexical.pkl", "rb") as f:
+            vector_store._lexical = pickle.load(f)
+    except Exception:
+        pass
+    
+    # Touch the directory so eviction treats it as recently used
+    os.utime(index_dir)
+    return vector_store, manifest
+
+
+def save_index_to_cache(fingerprint: str, vector_store: FAISS, manifest: dict):
+    """Persist a FAISS index under its fingerprint and enforce the cache size limit."""
+    index_dir = INDEX_CACHE_DIR / fingerprint
+    tmp_dir = INDEX_CACHE_DIR / f".{fingerprint}.{os.getpid()}.tmp"
+    
+    try:
+        INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        vector_store.save_local(str(tmp_dir))
+        (tmp_dir / "manifest.json").write_text(json.dumps(manifest))
+        if isinstance(vector_store, HybridFAISS):
+            with open(tmp_dir / "lexical.pkl", "wb") as f:
+                pickle.dump(vector_store.lexical_index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        if index_dir.exists():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            tmp_dir.rename(index_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    
+    evict_index_cache()
+
+
+def persist_index(fingerprint: str, vector_store: FAISS, manifest: dict, embeddings) -> FAISS:
+    """
+    Write an index to the cache. When the saved index qualifies for memory mapping,
+    return the mapped copy so the in-memory build can be freed.
+    """
+    save_index_to_cache(fingerprint, vector_store, manifest)
+    index_path = INDEX_CACHE_DIR / fingerprint / "index.faiss"
+    
+    if index_path.exists() and use_index_mmap(index_path):
+        mapped_store, _ = load_cached_index(fingerprint, embeddings)
+        if mapped_store is not None:
+            return mapped_store
+    
+    return vector_store
+
+
+def evict_index_cache(max_bytes: int = INDEX_CACHE_MAX_BYTES):
+    """Delete least recently used cached indexes until the cache fits in max_bytes."""
+    if not INDEX_CACHE_DIR.exists():
+        return
+    
+    entries = []
+    for index_dir in INDEX_CACHE_DIR.iterdir():
+        if not index_dir.is_dir() or index_dir.name.startswith("."):
+            continue
+        size = sum(f.stat().st_size for f in index_dir.iterdir() if f.is_file())
+        entries.append((index_dir.stat().st_mtime, size, index_dir))
+    
+    total = sum(size for _, size, _ in entries)
+    
+    for _, size, index_dir in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(index_dir, ignore_errors=True)
+        total -= size
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of chunk embeddings keyed by model name and chunk-text hash.
+    Holds at most max_entries rows; the least recently used tenth is pruned when full.
+    """
+
+    def __init__(self, path: Path, max_entries: int = EMBED_CACHE_MAX_ENTRIES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(embeddings)")]
+        if "used" not in columns:
+            self.conn.execute("ALTER TABLE embeddings ADD COLUMN used REAL NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+        self.conn.commit()
+        
+        self.max_entries = max_entries
+        self.count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode()).hexdigest()
+
+    def lookup(self, keys: list) -> dict:
+        """Fetch cached vectors for the given keys."""
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            
+            if found:
+                self.conn.executemany(
+                    "UPDATE embeddings SET used = ? WHERE key = ?",
+                    [(time.time(), key) for key in found]
+                )
+                self.conn.commit()
+        return found
+
+    def store(self, items: list):
+        """Persist (key, vector) pairs, pruning least recently used rows past max_entries."""
+        now = time.time()
+        
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items]
+            )
+            self.count += len(items)
+            
+            if self.count > self.max_entries:
+                # Freed pages are reused by later inserts, so the file stops growing
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY used LIMIT ?)",
+                    (self.count - int(self.max_entries * 0.9),)
+                )
+                self.count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            
+            self.conn.commit()
+
+    def embed_documents(self, texts: list, embeddings, model_name: str = EMBEDDING_MODEL_ID) -> tuple:
+        """Return (vectors, hits, misses), sending only uncached texts to the model."""
+        keys = [self.make_key(model_name, text) for text in texts]
+        found = self.lookup(list(set(keys)))
+        hits = sum(1 for key in keys if key in found)
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        
+        if missing:
+            new_vectors = embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), new_vectors))
+            self.store(new_items)
+            for key, vector in new_items:
+                found[key] = np.asarray(vector, dtype=np.float32)
+        
+        vectors = [found[key].tolist() for key in keys]
+        return vectors, hits, len(texts) - hits
+
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide chunk embedding cache shared by PDFs, crawls and sessions."""
+    return EmbeddingCache(INDEX_CACHE_DIR / "embeddings.sqlite")
+
+
+INDEX_IDLE_SECONDS = int(os.getenv("INDEX_IDLE_SECONDS", "1800"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_index_registry() -> IndexRegistry:
+    """Vector store registry shared by every session in this process."""
+    return IndexRegistry(INDEX_IDLE_SECONDS)
+
+
+def fingerprint_uploads(uploaded_files: list) -> tuple:
+    """Return (source_hashes, fingerprint) for a set of uploaded files."""
+    source_hashes = {pdf_file.name: hash_bytes(pdf_file.getvalue()) for pdf_file in uploaded_files}
+    return source_hashes, compute_corpus_fingerprint(source_hashes)
+
+
+def sync_pdf_index(uploaded_files: list, embeddings, vector_store, manifest, progress_bar, status_text) -> tuple:
+    """
+    Bring the PDF index in line with the current uploads.
+    Reuses the shared in-process index or a cached one for the exact upload set if
+    there is one; otherwise deletes vectors of removed or changed PDFs and embeds only
+    new ones. Returns (vector_store, manifest, fingerprint).
+    """
+    source_hashes, fingerprint = fingerprint_uploads(uploaded_files)
+    registry = get_index_registry()
+    session_id = st.session_state.session_id
+    
+    shared_store, shared_manifest = registry.acquire(fingerprint, session_id)
+    if shared_store is not None:
+        status_text.write("⚡ Using shared index")
+        return shared_store, shared_manifest, fingerprint
+    
+    status_text.write("🔎 Checking index cache...")
+    cached_store, cached_manifest = load_cached_index(fingerprint, embeddings)
+    if cached_store is not None:
+        status_text.write("⚡ Loaded index from cache")
+        return (*registry.acquire(fingerprint, session_id, cached_store, cached_manifest), fingerprint)
+    
+    # Only an index that carries a PDF manifest and supports removal can be updated in place
+    if vector_store is None or not manifest or not supports_removal(vector_store.index):
+        vector_store, manifest = None, {}
+    else:
+        manifest = {name: dict(entry) for name, entry in manifest.items()}
+    
+    removed = [name for name, entry in manifest.items() if source_hashes.get(name) != entry["hash"]]
+    new_files = [pdf_file for pdf_file in uploaded_files if pdf_file.name not in manifest or pdf_file.name in removed]
+    
+    # The current index may be shared with other sessions: copy before changing it
+    if vector_store is not None and (removed or new_files):
+        vector_store = clone_vector_store(vector_store, embeddings)
+    
+    if removed:
+        status_text.write(f"🗑️ Removing {len(removed)} PDF(s) from the index...")
+        removed_ids = [chunk_id for name in removed for chunk_id in manifest.pop(name)["ids"]]
+        
+        if manifest:
+            vector_store.delete(removed_ids)
+        else:
+            vector_store = None
+    
+    if new_files:
+        errors = {}
+        stages = {"pages": 0, "total_pages": 0, "chunks": 0, "embedded": 0}
+        
+        def show_stages():
+            status_text.write(
+                f"📖 Pages {stages['pages']}/{stages['total_pages']} ({PDF_EXTRACT_BACKEND}) • "
+                f"✂️ {stages['chunks']} chunks • 🧠 {stages['embedded']} embedded"
+            )
+        
+        def report_pages(done: int, total: int):
+            stages["pages"], stages["total_pages"] = done, total
+            progress_bar.progress(done / total)
+            show_stages()
+        
+        def report_chunks(chunks: int, embedded: int):
+            stages["chunks"], stages["embedded"] = chunks, embedded
+            show_stages()
+        
+        # extract page -> split -> embed batch -> add to index, one bounded batch at a time
+        pages = iter_pdf_pages(new_files, errors, report_pages)
+        try:
+            vector_store = split_and_embed_texts(pages, embeddings, vector_store, manifest, report_chunks)
+        except ValueError:
+            if len(errors) < len(new_files):
+                raise
+        
+        for name, error in errors.items():
+            st.error(f"❌ Error in {name}: {error}")
+        
+        for name, entry in manifest.items():
+            entry.setdefault("hash", source_hashes[name])
+    
+    if vector_store is None:
+        registry.release(session_id)
+        return None, {}, fingerprint
+    
+    vector_store = persist_index(fingerprint, vector_store, manifest, embeddings)
+    return (*registry.acquire(fingerprint, session_id, vector_store, manifest), fingerprint)
+
+
+# =============================================================================
+# 8. ANSWER CACHE & QUICK-ANSWER ROUTER
+# =============================================================================
+
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+
+
+class AnswerCache:
+    """
+    Process-wide cache of generated answers.
+    Entries are scoped by (mode, index fingerprint) and matched by question-embedding
+    similarity, so paraphrased questions hit too. Expires by TTL and evicts LRU.
+    """
+
+    def __init__(self, max_entries: int, ttl: int, threshold: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+        self.lock = threading.Lock()
+
+    def lookup(self, scope: tuple, question: str, question_vector: np.ndarray = None):
+        """
+        Return the cached result for the same or most similar question in scope, or None.
+        Without a question vector only exact (normalized) questions match.
+        """
+        now = time.time()
+        
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if now - entry["created"] > self.ttl]:
+                del self.entries[key]
+            
+            candidates = [(key, entry) for key, entry in self.entries.items() if entry["scope"] == scope]
+            match = next(((key, entry) for key, entry in candidates if entry["question"] == question), None)
+            
+            candidates = [(key, entry) for key, entry in candidates if entry["vector"] is not None]
+            if match is None and candidates and question_vector is not None:
+                similarities = np.vstack([entry["vector"] for _, entry in candidates]) @ question_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    match = candidates[best]
+            
+            if match is not None:
+                key, entry = match
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["saved_seconds"] += entry["latency"]
+                return entry["result"]
+            
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, scope: tuple, question: str, question_vector: np.ndarray, result: tuple, latency: float):
+        with self.lock:
+            self.entries[uuid.uuid4().hex] = {
+                "scope": scope,
+                "question": question,
+                "vector": question_vector,
+                "result": result,
+                "latency": latency,
+                "created": time.time()
+            }
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+@st.cache_resource(show_spinner=False)
+def get_answer_cache() -> AnswerCache:
+    """Answer cache shared by every session in this process."""
+    return AnswerCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL, ANSWER_CACHE_THRESHOLD)
+
+
+FAQ_ROUTER_THRESHOLD = float(os.getenv("FAQ_ROUTER_THRESHOLD", "0.80"))
+
+
+FAQ_LEXICAL_THRESHOLD = float(os.getenv("FAQ_LEXICAL_THRESHOLD", "0.6"))
+# Question phrasing that carries no topic; dropped before term overlap is compared
+FAQ_QUESTION_WORDS = frozenset("can could did do does many much there".split())
+
+
+class FaqRouter:
+    """
+    In-memory index of the PRE_ANSWERED_QUESTIONS embeddings. Typed questions that
+    closely match one are answered with its curated answer, skipping search and the LLM.
+    Until the embedding model is loaded, questions are matched by term overlap instead.
+    """
+
+    def __init__(self, questions: list, threshold: float, lexical_threshold: float):
+        self.questions = questions
+        # Drop the emoji prefix so only the wording is compared
+        self.texts = [re.sub(r'^\W+', '', question).strip().lower() for question in questions]
+        self.term_sets = [self.terms(text) for text in self.texts]
+        self.vectors = None
+        self.threshold = threshold
+        self.lexical_threshold = lexical_threshold
+        self.stats = {"hits": 0, "misses": 0}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def terms(text: str) -> set:
+        return set(lexical_tokens(text)) - FAQ_QUESTION_WORDS
+
+    def similarities(self, question: str, question_vector: np.ndarray, embeddings) -> tuple:
+        """
+        Return (similarities, threshold): cosine when embeddings are given, else term Jaccard.
+        Lexically, an entry only scores if it contains every term of the question, so a
+        question naming something the entry does not cover ("fees for MBA") is not matched.
+        """
+        if question_vector is not None and embeddings is not None:
+            with self.lock:
+                if self.vectors is None:
+                    self.vectors = np.asarray(embeddings.embed_documents(self.texts), dtype=np.float32)
+            return self.vectors @ question_vector, self.threshold
+        
+        terms = self.terms(question)
+        return np.array([
+            len(terms) / len(faq_terms) if terms and terms <= faq_terms else 0.0
+            for faq_terms in self.term_sets
+        ]), self.lexical_threshold
+
+    def route(self, question: str, question_vector: np.ndarray = None, embeddings=None):
+        """Return (faq_question, similarity) for a confident match, or None."""
+        similarities, threshold = self.similarities(question, question_vector, embeddings)
+        best = int(np.argmax(similarities))
+        hit = similarities[best] >= threshold
+        
+        with self.lock:
+            self.stats["hits" if hit else "misses"] += 1
+            routed = self.stats["hits"] + self.stats["misses"]
+            hit_rate = self.stats["hits"] / routed
+        
+        logger.info(
+            "FAQ router %s (similarity %.3f to %r) • hit rate %.1f%% over %d questions",
+            "hit" if hit else "miss", similarities[best], self.questions[best], hit_rate * 100, routed
+        )
+        return (self.questions[best], float(similarities[best])) if hit else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_faq_router() -> FaqRouter:
+    """Quick-answer router shared by every session; FAQ embeddings are computed once."""
+    return FaqRouter(list(PRE_ANSWERED_QUESTIONS), FAQ_ROUTER_THRESHOLD, FAQ_LEXICAL_THRESHOLD)
+
+
+def answer_with_cache(mode: str, fingerprint: str, user_question: str, embeddings, answer_fn) -> tuple:
+    """
+    Answer from the quick-answer router or the answer cache when possible, else call answer_fn.
+    Follow-up questions depend on the conversation, so they always go to answer_fn.
+    embeddings may be None (model not loaded yet): matching is then lexical or exact.
+    """
+    if is_follow_up(user_question):
+        return answer_fn()
+    
+    question = user_question.strip().lower()
+    question_vector = None
+    if embeddings is not None:
+        question_vector = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+    
+    routed = get_faq_router().route(question, question_vector, embeddings)
+    if routed is not None:
+        faq_question, similarity = routed
+        st.caption(f"⭐ Quick answer for “{faq_question}” (match {similarity:.0%})")
+        return PRE_ANSWERED_QUESTIONS[faq_question], [], ""
+    
+    cache = get_answer_cache()
+    scope = (mode, fingerprint or "")
+    
+    cached = cache.lookup(scope, question, question_vector)
+    if cached is not None:
+        st.caption("⚡ Answered from cache (a similar question was asked recently)")
+        return cached
+    
+    started = time.perf_counter()
+    result = answer_fn()
+    
+    if not result[0].startswith(("Error", "Unable to find")):
+        cache.store(scope, question, question_vector, result, time.perf_counter() - started)
+    
+    return result
+
+
+# =============================================================================
+# 9. CONVERSATION MEMORY
+# =============================================================================
+
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "4"))
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "600"))
+MEMORY_SUMMARY_BATCH = int(os.getenv("MEMORY_SUMMARY_BATCH", "3"))
+MEMORY_ANSWER_CHARS = 600
+CHAT_HISTORY_LIMIT = 50
+
+class ConversationMemory:
+    """
+    Rolling window of recent turns plus an incrementally updated summary of older turns,
+    kept within a token budget so long sessions stay small. Turns that leave the window
+    are folded into the summary in batches, on a background thread.
+    """
+
+    def __init__(self, recent_turns: int = MEMORY_RECENT_TURNS, token_budget: int = MEMORY_TOKEN_BUDGET,
+                 summary_batch: int = MEMORY_SUMMARY_BATCH):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_batch = summary_batch
+        self.turns = deque()
+        self.pending = []
+        self.summary = ""
+        self.summarizing = False
+        self.lock = threading.Lock()
+
+    def context(self) -> str:
+        """Render the memory for inclusion in a prompt."""
+        with self.lock:
+            summary = self.summary
+            turns = self.pending + list(self.turns)
+        
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier conversation: {summary}")
+        for question, answer in turns:
+            parts.append(f"User: {question}\nAssistant: {answer}")
+        return "\n\n".join(parts)
+
+    def add_turn(self, question: str, answer: str, llm, executor: ThreadPoolExecutor):
+        """
+        Store a turn. Once the window or budget overflows, the oldest turns wait in
+        pending (still shown verbatim) until a batch is summarized on executor.
+        """
+        with self.lock:
+            self.turns.append((question, answer[:MEMORY_ANSWER_CHARS]))
+            while len(self.turns) > self.recent_turns:
+                self.pending.append(self.turns.popleft())
+        
+        over_budget = count_tokens(self.context()) > self.token_budget
+        
+        with self.lock:
+            if over_budget and len(self.turns) > 1:
+                self.pending.append(self.turns.popleft())
+            
+            ready = len(self.pending) >= self.summary_batch or (over_budget and self.pending)
+            if not ready or self.summarizing:
+                return
+            self.summarizing = True
+        
+        executor.submit(self.fold_pending, llm, executor)
+
+    def fold_pending(self, llm, executor: ThreadPoolExecutor):
+        """Summarize the pending turns into the running summary (runs on a worker thread)."""
+        with self.lock:
+            summary, batch = self.summary, list(self.pending)
+        
+        new_summary = self.summarize(llm, summary, batch)
+        
+        with self.lock:
+            self.summary = new_summary
+            del self.pending[:len(batch)]
+            again = len(self.pending) >= self.summary_batch
+            self.summarizing = again
+        
+        if again:
+            executor.submit(self.fold_pending, llm, executor)
+
+    def summarize(self, llm, summary: str, turns: list) -> str:
+        """Fold turns into a summary with one short LLM call."""
+        new_lines = "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+        prompt = f"""Progressively summarize the conversation, adding the new lines to the current summary.
+Keep names, numbers and facts the user may refer back to. Reply with at most 120 words.
+
+Current summary:
+{summary or "(none)"}
+
+New lines:
+{new_lines}
+
+New summary:"""
+        
+        max_chars = self.token_budget * 2
+        try:
+            return llm.invoke(prompt).content.strip()[:max_chars]
+        except Exception:
+            # Keep the facts verbatim rather than losing them if the summary call fails
+            return f"{summary} {new_lines}".strip()[-max_chars:]
+
+
+def get_conversation_memory() -> ConversationMemory:
+    """Return this session's conversation memory, creating it on first use."""
+    if "conversation_memory" not in st.session_state:
+        st.session_state.conversation_memory = ConversationMemory()
+    return st.session_state.conversation_memory
+
+
+def is_follow_up(question: str) -> bool:
+    """Whether a question leans on earlier turns (and so must not be served from the shared cache)."""
+    return looks_like_follow_up(question) and bool(get_conversation_memory().turns)
+
+
+def record_turn(user_question: str, answer: str, llm):
+    """Add a finished turn to the capped chat history and the conversation memory."""
+    st.session_state.chat_history.append((user_question, answer[:MEMORY_ANSWER_CHARS]))
+    del st.session_state.chat_history[:-CHAT_HISTORY_LIMIT]
+    get_conversation_memory().add_turn(user_question, answer, llm, get_answer_executor())
+
+
+# =============================================================================
+# 10. ANSWER GENERATION (ChatGPT-LIKE!)
+# =============================================================================
+
+ANSWER_WORKERS = int(os.getenv("ANSWER_WORKERS", "16"))
+WEB_SEARCH_DEADLINE = float(os.getenv("WEB_SEARCH_DEADLINE", "4"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_answer_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all sessions for retrieval and web search."""
+    return ThreadPoolExecutor(max_workers=ANSWER_WORKERS, thread_name_prefix="answer")
+
+
+def run_with_deadlines(tasks: dict) -> dict:
+    """
+    Run {name: (func, deadline_seconds)} concurrently and return {name: result}.
+    A deadline of None waits for the task however long it takes. A task that fails
+    or misses its deadline maps to None; it is left to finish in the background
+    rather than holding up the answer.
+    """
+    executor = get_answer_executor()
+    started = time.monotonic()
+    futures = {name: executor.submit(func) for name, (func, _) in tasks.items()}
+    results = {}
+    
+    for name, future in futures.items():
+        deadline = tasks[name][1]
+        timeout = None if deadline is None else max(deadline - (time.monotonic() - started), 0)
+        try:
+            results[name] = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            results[name] = None
+        except Exception:
+            logger.exception("Answer task %r failed", name)
+            results[name] = None
+    
+    return results
+
+
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+RRF_CANDIDATES = int(os.getenv("RRF_CANDIDATES", "20"))
+RRF_K = 60
+LEXICAL_FAST_PATH_RATIO = float(os.getenv("LEXICAL_FAST_PATH_RATIO", "2.0"))
+IDENTIFIER_RE = re.compile(r'\b(?=[a-z]*\d)[a-z0-9]+\b')
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """Merge ranked lists of doc IDs by summing 1 / (k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def dense_search_ids(vector_store: FAISS, question: str, k: int) -> list:
+    """Doc IDs of the k nearest chunks to the question embedding."""
+    query_vector = np.asarray([vector_store.embeddings.embed_query(question)], dtype=np.float32)
+    _, positions = vector_store.index.search(query_vector, k)
+    return [vector_store.index_to_docstore_id[position] for position in positions[0] if position != -1]
+
+
+def retrieve_documents(vector_store: FAISS, question: str, k: int = RETRIEVAL_K, reranker=None,
+                       stats: dict = None) -> list:
+    """
+    Hybrid retrieval: BM25 and dense results fused by reciprocal rank.
+    When the question carries an identifier (course code, room number, amount) and the
+    best lexical hit clearly beats the runner-up, the dense search is skipped.
+    With a reranker, RERANK_CANDIDATES chunks are fetched and cut back to k by the cross-encoder.
+    """
+    if reranker is not None:
+        candidates = retrieve_documents(vector_store, question, RERANK_CANDIDATES)
+        return reranker.rerank(question, candidates, k, stats if stats is not None else {})
+    
+    if not isinstance(vector_store, HybridFAISS):
+        return vector_store.similarity_search(question, k=k)
+    
+    lexical_hits = vector_store.lexical_index.search(question, max(RRF_CANDIDATES, k))
+    lexical_ids = [doc_id for doc_id, _ in lexical_hits]
+    
+    strong_lexical = (
+        lexical_hits and
+        IDENTIFIER_RE.search(DIGIT_GROUP_RE.sub("", question.lower())) and
+        (len(lexical_hits) == 1 or lexical_hits[0][1] >= LEXICAL_FAST_PATH_RATIO * lexical_hits[1][1])
+    )
+    if strong_lexical:
+        doc_ids = lexical_ids[:k]
+    else:
+        dense_ids = dense_search_ids(vector_store, question, max(RRF_CANDIDATES, k))
+        doc_ids = reciprocal_rank_fusion([dense_ids, lexical_ids])[:k]
+    
+    return [vector_store.docstore.search(doc_id) for doc_id in doc_ids]
+
+
+RERANK_DEFAULT = os.getenv("RERANK", "").lower() in ("1", "true", "yes")
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_MAX_SECONDS = float(os.getenv("RERANK_MAX_SECONDS", "1.5"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+
+
+class Reranker:
+    """
+    Batched CPU cross-encoder over retrieved chunks, with an LRU cache of
+    (question, chunk) scores. Tracks the cost per scored pair and skips reranking
+    when a batch is expected to exceed max_seconds.
+    """
+
+    def __init__(self, model, max_seconds: float, cache_size: int):
+        self.model = model
+        self.max_seconds = max_seconds
+        self.cache_size = cache_size
+        self.scores = OrderedDict()
+        self.seconds_per_pair = 0.0
+        self.lock = threading.Lock()
+
+    def rerank(self, question: str, docs: list, top_n: int, stats: dict) -> list:
+        """Return the top_n docs by cross-encoder score, filling stats with timing."""
+        keys = [hashlib.sha256(f"{question}\0{doc.page_content}".encode()).hexdigest() for doc in docs]
+        
+        with self.lock:
+            scores = {key: self.scores[key] for key in keys if key in self.scores}
+            for key in scores:
+                self.scores.move_to_end(key)
+            
+            missing = {key: doc for key, doc in zip(keys, docs) if key not in scores}
+            estimate = len(missing) * self.seconds_per_pair
+            if estimate > self.max_seconds:
+                # Decay the estimate so reranking is retried once load drops
+                self.seconds_per_pair *= 0.9
+                stats.update(skipped=True, estimate=estimate)
+                return docs[:top_n]
+        
+        started = time.perf_counter()
+        if missing:
+            new_scores = self.model.predict(
+                [(question, doc.page_content) for doc in missing.values()],
+                batch_size=len(missing),
+                show_progress_bar=False
+            )
+            per_pair = (time.perf_counter() - started) / len(missing)
+            
+            with self.lock:
+                self.seconds_per_pair = per_pair if not self.seconds_per_pair else (
+                    0.7 * self.seconds_per_pair + 0.3 * per_pair
+                )
+                for key, score in zip(missing, new_scores):
+                    scores[key] = self.scores[key] = float(score)
+                while len(self.scores) > self.cache_size:
+                    self.scores.popitem(last=False)
+        
+        stats.update(
+            candidates=len(docs),
+            scored=len(missing),
+            seconds=time.perf_counter() - started
+        )
+        order = sorted(range(len(docs)), key=lambda i: scores[keys[i]], reverse=True)
+        return [docs[i] for i in order[:top_n]]
+
+
+@st.cache_resource(show_spinner="🎯 Loading reranker...")
+def get_reranker() -> Reranker:
+    """CPU cross-encoder shared by every session in this process."""
+    from sentence_transformers import CrossEncoder
+    
+    return Reranker(CrossEncoder(RERANK_MODEL_NAME, device="cpu"), RERANK_MAX_SECONDS, RERANK_CACHE_SIZE)
+
+
+def show_rerank_stats(stats: dict):
+    """Show what the reranking stage did for this question."""
+    if stats.get("skipped"):
+        st.caption(
+            f"⏭️ Reranking skipped (estimated {stats['estimate'] * 1000:.0f} ms "
+            f"over the {RERANK_MAX_SECONDS * 1000:.0f} ms ceiling)"
+        )
+    elif stats:
+        st.caption(
+            f"🎯 Reranked {stats['candidates']} chunks in {stats['seconds'] * 1000:.0f} ms "
+            f"({stats['candidates'] - stats['scored']} cached scores)"
+        )
+
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+MIN_CHUNK_OVERLAP = 40
+
+
+def overlap_length(left: str, right: str, max_length: int) -> int:
+    """Length of the longest suffix of left that is also a prefix of right."""
+    for length in range(min(len(left), len(right), max_length), MIN_CHUNK_OVERLAP - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def dedupe_chunks(docs: list) -> list:
+    """
+    Return chunk texts with the text repeated by the splitter's chunk_overlap removed.
+    Chunks fully contained in an earlier chunk are dropped.
+    """
+    kept = []
+    
+    for doc in docs:
+        header, body = "", doc.page_content
+        if body.startswith("[Source:"):
+            header, _, body = body.partition("\n\n")
+        
+        for _, kept_body in kept:
+            if body in kept_body:
+                body = ""
+                break
+            
+            # Neighbouring chunks share up to chunk_overlap characters at their boundary
+            body = body[overlap_length(kept_body, body, CHUNK_OVERLAP * 2):]
+            cut = overlap_length(body, kept_body, CHUNK_OVERLAP * 2)
+            if cut:
+                body = body[:-cut]
+        
+        if body.strip():
+            kept.append((header, body))
+    
+    return [f"{header}\n\n{body}" if header else body for header, body in kept]
+
+
+def build_prompt(preamble: str, sections: list, user_question: str, answer_label: str,
+                 token_budget: int = PROMPT_TOKEN_BUDGET) -> tuple:
+    """
+    Assemble a prompt from (heading, items, separator, empty_text) sections.
+    Items are packed in the order given (most relevant first) until token_budget is used up;
+    a section with no packed items shows empty_text, or is left out when that is None.
+    Returns (prompt, prompt_token_count).
+    """
+    remaining = token_budget - count_tokens(f"{preamble}\n\nUser Question:\n{user_question}\n\n{answer_label}")
+    parts = [preamble]
+    
+    for heading, items, separator, empty_text in sections:
+        remaining -= count_tokens(heading)
+        packed = []
+        
+        for item in items:
+            tokens = count_tokens(item)
+            if tokens <= remaining:
+                packed.append(item)
+                remaining -= tokens
+        
+        if packed:
+            parts.append(f"{heading}\n{separator.join(packed)}")
+        elif empty_text is not None:
+            parts.append(f"{heading}\n{empty_text}")
+    
+    parts.append(f"User Question:\n{user_question}")
+    parts.append(answer_label)
+    
+    prompt = "\n\n".join(parts)
+    return prompt, count_tokens(prompt)
+
+
+STREAM_RENDER_INTERVAL = 0.05
+
+
+def generate_answer(llm, prompt: str, placeholder=None, prompt_tokens: int = None) -> str:
+    """
+    Run the LLM on a prompt. With a placeholder, tokens are streamed into it as they arrive.
+    Prompt size, time-to-first-token and total generation time are stored in
+    st.session_state.generation_stats.
+    """
+    started = time.perf_counter()
+    first_token = None
+    
+    if placeholder is None:
+        answer = llm.invoke(prompt).content
+    else:
+        parts = []
+        last_render = 0.0
+        
+        for chunk in llm.stream(prompt):
+            if not chunk.content:
+                continue
+            
+            now = time.perf_counter()
+            if first_token is None:
+                first_token = now - started
+            parts.append(chunk.content)
+            
+            if now - last_render >= STREAM_RENDER_INTERVAL:
+                placeholder.markdown("".join(parts) + "▌")
+                last_render = now
+        
+        answer = "".join(parts)
+    
+    total = time.perf_counter() - started
+    st.session_state.generation_stats = {
+        "prompt_tokens": prompt_tokens if prompt_tokens is not None else count_tokens(prompt),
+        "first_token": first_token if first_token is not None else total,
+        "total": total
+    }
+    return answer
+
+
+def show_generation_stats():
+    """Show timing for the answer just generated (nothing for cached answers)."""
+    stats = st.session_state.get("generation_stats")
+    if stats:
+        st.caption(
+            f"🧾 Prompt {stats['prompt_tokens']} tokens • "
+            f"⚡ First token {stats['first_token']:.2f}s • Total generation {stats['total']:.2f}s"
+        )
+
+
+def answer_with_internet_only(llm, user_question: str, placeholder=None, embeddings=None,
+                              conversation: str = "") -> tuple:
     """
     Answer question using ONLY internet (like ChatGPT).
     No PDFs needed.
     """
     try:
         with st.spinner("🌐 Searching the internet for you..."):
-            web_results = perform_comprehensive_web_search(user_question)
+            web_results = perform_comprehensive_web_search(user_question, fetch_pages=WEB_FETCH_PAGES)
         
         if not web_results["success"]:
             return "Unable to find information on the internet.", [], ""
         
-        web_content = web_results["content"]
+        web_items = build_web_context(web_results, user_question, embeddings)
+        web_content = "\n".join(web_items)
         
-        prompt = f"""You are a helpful AI assistant like ChatGPT. Answer the user's question comprehensively using the internet search results provided.
+        prompt, prompt_tokens = build_prompt(
+            """You are a helpful AI assistant like ChatGPT. Answer the user's question comprehensively using the internet search results provided.
 
 Instructions:
 1. Provide a detailed, well-structured answer
@@ -666,39 +2090,60 @@ Instructions:
 3. Be conversational and helpful
 4. If information is incomplete, acknowledge it
 5. Format with bullet points where appropriate
-6. Provide practical advice when relevant
-
-Internet Search Results:
-{web_content}
-
-User Question:
-{user_question}
-
-Your Answer:"""
+6. Provide practical advice when relevant""",
+            [
+                ("Conversation So Far:", [conversation] if conversation else [], "", None),
+                ("Internet Search Results:", web_items, "\n", "No internet results found."),
+            ],
+            user_question,
+            "Your Answer:"
+        )
         
-        response = llm.invoke(prompt)
-        return response.content, [], web_content
+        answer = generate_answer(llm, prompt, placeholder, prompt_tokens)
+        return answer, [], web_content
             
     except Exception as e:
         return f"Error: {str(e)}", [], ""
 
 
-def answer_with_pdf_context(vector_store: FAISS, llm, user_question: str, include_internet: bool = True) -> tuple:
+def answer_with_pdf_context(vector_store: FAISS, llm, user_question: str, include_internet: bool = True,
+                            placeholder=None, embeddings=None, conversation: str = "") -> tuple:
     """Answer using PDF context (with optional internet)."""
     try:
-        retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-        docs = retriever.invoke(user_question)
+        # The reranker is loaded here, on the script thread, where its loading spinner can render
+        reranker = get_reranker() if st.session_state.get("rerank_chunks", RERANK_DEFAULT) else None
+        rerank_stats = {}
         
-        pdf_context = "\n\n".join([doc.page_content for doc in docs])
+        def retrieve():
+            return retrieve_documents(vector_store, user_question, reranker=reranker, stats=rerank_stats)
         
-        web_content = ""
         if include_internet:
+            # Retrieval and web search are independent, so run them side by side; only the web has a deadline
             with st.spinner("🌐 Enhancing with internet search..."):
-                web_results = perform_comprehensive_web_search(user_question)
-                if web_results["success"]:
-                    web_content = f"\n\nInternet Search Results:\n{web_results['content']}"
+                results = run_with_deadlines({
+                    "docs": (retrieve, None),
+                    "web": (lambda: perform_comprehensive_web_search(user_question), WEB_SEARCH_DEADLINE),
+                })
+            if results["docs"] is None:
+                st.caption("⚠️ Document retrieval failed, answering from internet results only")
+        else:
+            with st.spinner("📚 Retrieving documents..."):
+                results = {"docs": retrieve()}
+        
+        docs = results["docs"] or []
+        show_rerank_stats(rerank_stats)
+        
+        web_items = []
+        if include_internet:
+            web_results = results["web"]
+            if web_results is None:
+                st.caption("⏱️ Web search was too slow, answering from documents only")
+            elif web_results["success"]:
+                web_items = build_web_context(web_results, user_question, embeddings)
+        web_content = "\n".join(web_items)
         
-        prompt = f"""You are a helpful AI assistant answering questions based on uploaded documents and optionally internet information.
+        prompt, prompt_tokens = build_prompt(
+            """You are a helpful AI assistant answering questions based on uploaded documents and optionally internet information.
 
 Instructions:
 1. PRIORITIZE information from uploaded documents
@@ -706,39 +2151,56 @@ Instructions:
 3. Clearly indicate the source of information
 4. Be detailed and comprehensive
 5. Use formatting with bullet points and headers
-6. If information is not in documents, clearly say so
-
-Uploaded Document Context:
-{pdf_context}
-{web_content}
-
-User Question:
-{user_question}
-
-Your Answer (cite sources):"""
+6. If information is not in documents, clearly say so""",
+            [
+                ("Conversation So Far:", [conversation] if conversation else [], "", None),
+                ("Uploaded Document Context:", dedupe_chunks(docs), "\n\n", ""),
+                ("Internet Search Results:", web_items, "\n", None),
+            ],
+            user_question,
+            "Your Answer (cite sources):"
+        )
         
-        response = llm.invoke(prompt)
-        return response.content, docs, web_content
+        answer = generate_answer(llm, prompt, placeholder, prompt_tokens)
+        return answer, docs, web_content
             
     except Exception as e:
         return f"Error: {str(e)}", [], ""
 
 
-def answer_hybrid_mode(vector_store: FAISS, llm, user_question: str) -> tuple:
+def answer_hybrid_mode(vector_store: FAISS, llm, user_question: str, placeholder=None, embeddings=None,
+                       conversation: str = "") -> tuple:
     """
     Full ChatGPT-like experience: Use PDFs + Internet.
     """
-    retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-    docs = retriever.invoke(user_question)
-    
-    pdf_context = "\n\n".join([doc.page_content for doc in docs]) if docs else "No documents available."
+    reranker = get_reranker() if st.session_state.get("rerank_chunks", RERANK_DEFAULT) else None
+    rerank_stats = {}
     
+    # Retrieval and web search are independent, so run them side by side; only the web has a deadline
     with st.spinner("🌐 Fetching internet information..."):
-        web_results = perform_comprehensive_web_search(user_question)
+        results = run_with_deadlines({
+            "docs": (
+                lambda: retrieve_documents(vector_store, user_question, reranker=reranker, stats=rerank_stats),
+                None
+            ),
+            "web": (lambda: perform_comprehensive_web_search(user_question), WEB_SEARCH_DEADLINE),
+        })
+    
+    if results["docs"] is None:
+        st.caption("⚠️ Document retrieval failed, answering from internet results only")
+    docs = results["docs"] or []
+    show_rerank_stats(rerank_stats)
     
-    web_content = web_results["content"] if web_results["success"] else "No internet results found."
+    web_results = results["web"]
+    if web_results is None:
+        st.caption("⏱️ Web search was too slow, answering from documents only")
+    web_items = []
+    if web_results and web_results["success"]:
+        web_items = build_web_context(web_results, user_question, embeddings)
+    web_content = "\n".join(web_items) if web_items else "No internet results found."
     
-    prompt = f"""You are an intelligent AI assistant providing comprehensive answers.
+    prompt, prompt_tokens = build_prompt(
+        """You are an intelligent AI assistant providing comprehensive answers.
 
 Instructions:
 1. Combine knowledge from documents AND internet
@@ -746,25 +2208,22 @@ Instructions:
 3. Use bullet points and structured formatting
 4. Cite sources where applicable
 5. Be conversational and helpful
-6. Provide practical examples when relevant
-
-Document Context:
-{pdf_context}
-
-Internet Search Results:
-{web_content}
-
-User Question:
-{user_question}
-
-Comprehensive Answer:"""
+6. Provide practical examples when relevant""",
+        [
+            ("Conversation So Far:", [conversation] if conversation else [], "", None),
+            ("Document Context:", dedupe_chunks(docs), "\n\n", "No documents available."),
+            ("Internet Search Results:", web_items, "\n", "No internet results found."),
+        ],
+        user_question,
+        "Comprehensive Answer:"
+    )
     
-    response = llm.invoke(prompt)
-    return response.content, docs, web_content
+    answer = generate_answer(llm, prompt, placeholder, prompt_tokens)
+    return answer, docs, web_content
 
 
 # =============================================================================
-# 8. MAIN APP INITIALIZATION
+# 11. MAIN APP INITIALIZATION
 # =============================================================================
 
 if "chat_history" not in st.session_state:
@@ -776,13 +2235,33 @@ if "question_count" not in st.session_state:
 if "mode" not in st.session_state:
     st.session_state.mode = "AI_ONLY"  # AI_ONLY, PDF_ONLY, HYBRID, WEB_CRAWL
 
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Heartbeat the shared index this session uses (re-registering it if it was evicted while idle)
+if "vector_store" in st.session_state and st.session_state.get("index_fingerprint"):
+    registry = get_index_registry()
+    if not registry.touch(st.session_state.index_fingerprint, st.session_state.session_id):
+        st.session_state.vector_store, _ = registry.acquire(
+            st.session_state.index_fingerprint,
+            st.session_state.session_id,
+            st.session_state.vector_store,
+            st.session_state.get("index_manifest")
+        )
+
 api_key = load_and_validate_groq_key()
 
-with st.spinner("🚀 Loading AI models..."):
-    embeddings, llm = initialize_groq(api_key)
+with st.spinner("🚀 Connecting to Groq..."):
+    llm = initialize_groq(api_key)
+
+# The embedding model loads when a document mode is picked (or in the background with
+# EMBED_WARMUP); AI-only sessions never need it, and use it only if it is already loaded
+embeddings = get_embeddings()
+if EMBED_WARMUP:
+    embeddings.warm()
 
 # =============================================================================
-# 9. HEADER & METRICS
+# 12. HEADER & METRICS
 # =============================================================================
 
 col_header = st.columns([1, 3, 1])
@@ -820,7 +2299,7 @@ with col4:
 st.divider()
 
 # =============================================================================
-# 10. SIDEBAR CONTROLS
+# 13. SIDEBAR CONTROLS
 # =============================================================================
 
 with st.sidebar:
@@ -854,6 +2333,50 @@ with st.sidebar:
     else:
         st.markdown('<span class="mode-badge mode-web">🌐 Web Crawl</span>', unsafe_allow_html=True)
     
+    st.checkbox("⚡ Stream answers as they are written", value=True, key="stream_answers")
+    st.checkbox("🎯 Rerank retrieved chunks", value=RERANK_DEFAULT, key="rerank_chunks")
+    
+    st.divider()
+    
+    # Answer cache metrics (shared across all sessions)
+    answer_stats = get_answer_cache().stats
+    answer_lookups = answer_stats["hits"] + answer_stats["misses"]
+    col_cache1, col_cache2 = st.columns(2)
+    with col_cache1:
+        st.metric(
+            "🎯 Cache Hit Rate",
+            f"{answer_stats['hits'] / answer_lookups:.0%}" if answer_lookups else "—"
+        )
+    with col_cache2:
+        st.metric("⏱️ Time Saved", f"{answer_stats['saved_seconds']:.1f}s")
+    
+    startup_times = get_startup_times()
+    st.caption(
+        f"🚀 Startup: LLM {startup_times.get('llm', 0):.2f}s • Embeddings "
+        + (f"{startup_times['embeddings']:.2f}s" if "embeddings" in startup_times else "not loaded")
+    )
+    
+    router_stats = get_faq_router().stats
+    routed = router_stats["hits"] + router_stats["misses"]
+    if routed:
+        st.caption(
+            f"⭐ Quick answers served {router_stats['hits']} of {routed} typed questions "
+            f"({router_stats['hits'] / routed:.0%})"
+        )
+    
+    # Shared vector indexes (one copy per corpus, across all sessions)
+    index_stats = get_index_registry().stats()
+    if index_stats:
+        with st.expander(f"🧮 Shared Indexes ({len(index_stats)})"):
+            current_fingerprint = st.session_state.get("index_fingerprint")
+            for fingerprint, sessions, resident_bytes, mapped_bytes in index_stats:
+                marker = " • yours" if fingerprint == current_fingerprint else ""
+                mapped = f" + {mapped_bytes / 1_048_576:.1f} MB mapped" if mapped_bytes else ""
+                st.caption(
+                    f"`{fingerprint[:10]}` — {resident_bytes / 1_048_576:.1f} MB{mapped} • "
+                    f"{sessions} session(s){marker}"
+                )
+    
     st.divider()
     
     # Clear buttons
@@ -861,11 +2384,13 @@ with st.sidebar:
     with col_btn1:
         if st.button("🔄 Clear Chat", use_container_width=True):
             st.session_state.chat_history = []
+            st.session_state.pop("conversation_memory", None)
             st.session_state.question_count = 0
             st.rerun()
     
     with col_btn2:
         if st.button("🗑️ Clear All", use_container_width=True):
+            get_index_registry().release(st.session_state.session_id)
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.rerun()
@@ -906,7 +2431,7 @@ with st.sidebar:
                 st.rerun()
 
 # =============================================================================
-# 11. DISPLAY PRE-ANSWERED QUESTION
+# 14. DISPLAY PRE-ANSWERED QUESTION
 # =============================================================================
 
 if st.session_state.get("show_pre_answered") and "selected_pre_answer" in st.session_state:
@@ -955,9 +2480,13 @@ if st.session_state.get("show_pre_answered") and "selected_pre_answer" in st.ses
 
 else:
     # =============================================================================
-    # 12. MAIN INTERFACE - DIFFERENT MODES
+    # 15. MAIN INTERFACE - DIFFERENT MODES
     # =============================================================================
     
+    if st.session_state.mode != "AI_ONLY" and not embeddings.loaded:
+        with st.spinner("🧠 Loading embedding model..."):
+            embeddings.load()
+    
     if st.session_state.mode == "AI_ONLY":
         # =========== AI ONLY MODE (ChatGPT-like) ===========
         
@@ -998,23 +2527,37 @@ else:
             try:
                 st.session_state.question_count += 1
                 
-                with st.spinner("🔍 Searching internet and analyzing..."):
-                    answer, docs, web_content = answer_with_internet_only(llm, user_question)
-                
-                st.session_state.chat_history.append((user_question, answer))
+                st.session_state.pop("generation_stats", None)
                 
-                # Display answer
+                # Display answer (tokens stream into the placeholder)
                 st.markdown("""
                 <div class="answer-section">
                     <h3 style="margin-top: 0;">✨ Answer</h3>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                st.markdown(f"""
+                answer_placeholder = st.empty()
+                stream_target = answer_placeholder if st.session_state.get("stream_answers", True) else None
+                
+                # Use the embedding model only if something else already loaded it
+                ready_embeddings = embeddings if embeddings.loaded else None
+                
+                with st.spinner("🔍 Searching internet and analyzing..."):
+                    answer, docs, web_content = answer_with_cache(
+                        "AI_ONLY", None, user_question, ready_embeddings,
+                        lambda: answer_with_internet_only(
+                            llm, user_question, placeholder=stream_target, embeddings=ready_embeddings,
+                            conversation=get_conversation_memory().context()
+                        )
+                    )
+                
+                answer_placeholder.markdown(f"""
                 <div style="background: rgba(255,255,255,0.05); padding: 1.5rem; border-radius: 10px; border-left: 4px solid #667eea;">
                     {answer}
                 </div>
                 """, unsafe_allow_html=True)
+                show_generation_stats()
+                record_turn(user_question, answer, llm)
                 
                 # Display internet sources
                 if web_content:
@@ -1086,43 +2629,40 @@ else:
                 """, unsafe_allow_html=True)
         
         # Process PDFs
-        if uploaded_files and ("vector_store" not in st.session_state or st.session_state.mode != "PDF_ONLY"):
+        # An empty uploader keeps the current index (widget state is dropped when switching modes)
+        upload_fingerprint = fingerprint_uploads(uploaded_files)[1] if uploaded_files else None
+        
+        if uploaded_files and upload_fingerprint != st.session_state.get("index_fingerprint"):
             st.divider()
             
             progress_bar = st.progress(0)
             status_text = st.empty()
             
             try:
-                texts_dict = {}
-                
-                for idx, pdf_file in enumerate(uploaded_files):
-                    progress = idx / len(uploaded_files)
-                    progress_bar.progress(progress)
-                    status_text.write(f"📖 Processing: **{pdf_file.name}**...")
-                    
-                    try:
-                        text = extract_text_from_pdf(pdf_file)
-                        texts_dict[pdf_file.name] = text
-                    except ValueError as e:
-                        st.error(f"❌ Error in {pdf_file.name}: {str(e)}")
-                        continue
+                vector_store, manifest, fingerprint = sync_pdf_index(
+                    uploaded_files,
+                    embeddings,
+                    st.session_state.get("vector_store"),
+                    st.session_state.get("index_manifest"),
+                    progress_bar,
+                    status_text
+                )
                 
-                if not texts_dict:
+                if vector_store is None:
+                    for key in ("vector_store", "index_manifest", "index_fingerprint"):
+                        st.session_state.pop(key, None)
                     st.error("❌ No valid PDFs processed.")
                     st.stop()
                 
-                status_text.write("🔗 Creating embeddings...")
-                progress_bar.progress(0.8)
-                
-                vector_store = split_and_embed_texts(texts_dict, embeddings)
-                
                 st.session_state.vector_store = vector_store
-                st.session_state.uploaded_pdfs = list(texts_dict.keys())
+                st.session_state.index_manifest = manifest
+                st.session_state.uploaded_pdfs = list(manifest.keys())
+                st.session_state.index_fingerprint = fingerprint
                 
                 progress_bar.progress(1.0)
                 
                 st.balloons()
-                st.success(f"🎉 Successfully loaded **{len(texts_dict)}** PDF(s)!")
+                st.success(f"🎉 Successfully loaded **{len(manifest)}** PDF(s)!")
                 
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
@@ -1158,27 +2698,39 @@ else:
                 try:
                     st.session_state.question_count += 1
                     
-                    with st.spinner("🔍 Searching PDFs..."):
-                        answer, docs, _ = answer_with_pdf_context(
-                            st.session_state.vector_store,
-                            llm,
-                            user_question,
-                            include_internet=False
-                        )
-                    
-                    st.session_state.chat_history.append((user_question, answer))
+                    st.session_state.pop("generation_stats", None)
                     
+                    # Display answer (tokens stream into the placeholder)
                     st.markdown("""
                     <div class="answer-section">
                         <h3 style="margin-top: 0;">📝 Answer</h3>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    st.markdown(f"""
+                    answer_placeholder = st.empty()
+                    stream_target = answer_placeholder if st.session_state.get("stream_answers", True) else None
+                    
+                    with st.spinner("🔍 Searching PDFs..."):
+                        answer, docs, _ = answer_with_cache(
+                            "PDF_ONLY", st.session_state.get("index_fingerprint"), user_question, embeddings,
+                            lambda: answer_with_pdf_context(
+                                st.session_state.vector_store,
+                                llm,
+                                user_question,
+                                include_internet=False,
+                                placeholder=stream_target,
+                                embeddings=embeddings,
+                                conversation=get_conversation_memory().context()
+                            )
+                        )
+                    
+                    answer_placeholder.markdown(f"""
                     <div style="background: rgba(255,255,255,0.05); padding: 1.5rem; border-radius: 10px; border-left: 4px solid #667eea;">
                         {answer}
                     </div>
                     """, unsafe_allow_html=True)
+                    show_generation_stats()
+                    record_turn(user_question, answer, llm)
                     
                     if docs:
                         with st.expander("📚 Source Documents"):
@@ -1232,36 +2784,34 @@ else:
                 st.info("💡 PDFs are optional. You can ask questions without uploading!")
         
         # Process PDFs if uploaded
-        if uploaded_files and ("vector_store" not in st.session_state or st.session_state.mode != "HYBRID"):
+        # An empty uploader keeps the current index (widget state is dropped when switching modes)
+        upload_fingerprint = fingerprint_uploads(uploaded_files)[1] if uploaded_files else None
+        
+        if uploaded_files and upload_fingerprint != st.session_state.get("index_fingerprint"):
             st.divider()
             
             progress_bar = st.progress(0)
             status_text = st.empty()
             
             try:
-                texts_dict = {}
-                
-                for idx, pdf_file in enumerate(uploaded_files):
-                    progress = idx / len(uploaded_files)
-                    progress_bar.progress(progress)
-                    status_text.write(f"📖 Processing: **{pdf_file.name}**...")
-                    
-                    try:
-                        text = extract_text_from_pdf(pdf_file)
-                        texts_dict[pdf_file.name] = text
-                    except ValueError as e:
-                        st.error(f"❌ Error in {pdf_file.name}: {str(e)}")
-                        continue
+                vector_store, manifest, fingerprint = sync_pdf_index(
+                    uploaded_files,
+                    embeddings,
+                    st.session_state.get("vector_store"),
+                    st.session_state.get("index_manifest"),
+                    progress_bar,
+                    status_text
+                )
                 
-                if not texts_dict:
+                if vector_store is None:
+                    for key in ("vector_store", "index_manifest"):
+                        st.session_state.pop(key, None)
                     st.warning("⚠️ No valid PDFs. You can still ask questions using internet!")
                 else:
-                    status_text.write("🔗 Creating embeddings...")
-                    progress_bar.progress(0.8)
-                    
-                    vector_store = split_and_embed_texts(texts_dict, embeddings)
                     st.session_state.vector_store = vector_store
-                    st.session_state.uploaded_pdfs = list(texts_dict.keys())
+                    st.session_state.index_manifest = manifest
+                    st.session_state.uploaded_pdfs = list(manifest.keys())
+                st.session_state.index_fingerprint = fingerprint
                 
                 progress_bar.progress(1.0)
                 st.balloons()
@@ -1300,29 +2850,47 @@ else:
             try:
                 st.session_state.question_count += 1
                 
-                with st.spinner("🔍 Searching PDFs and internet..."):
-                    if "vector_store" in st.session_state and st.session_state.mode == "HYBRID":
-                        answer, docs, web_content = answer_hybrid_mode(
-                            st.session_state.vector_store,
-                            llm,
-                            user_question
-                        )
-                    else:
-                        answer, docs, web_content = answer_with_internet_only(llm, user_question)
-                
-                st.session_state.chat_history.append((user_question, answer))
+                st.session_state.pop("generation_stats", None)
                 
+                # Display answer (tokens stream into the placeholder)
                 st.markdown("""
                 <div class="answer-section">
                     <h3 style="margin-top: 0;">✨ Comprehensive Answer</h3>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                st.markdown(f"""
+                answer_placeholder = st.empty()
+                stream_target = answer_placeholder if st.session_state.get("stream_answers", True) else None
+                
+                with st.spinner("🔍 Searching PDFs and internet..."):
+                    if "vector_store" in st.session_state and st.session_state.mode == "HYBRID":
+                        answer, docs, web_content = answer_with_cache(
+                            "HYBRID", st.session_state.get("index_fingerprint"), user_question, embeddings,
+                            lambda: answer_hybrid_mode(
+                                st.session_state.vector_store,
+                                llm,
+                                user_question,
+                                placeholder=stream_target,
+                                embeddings=embeddings,
+                                conversation=get_conversation_memory().context()
+                            )
+                        )
+                    else:
+                        answer, docs, web_content = answer_with_cache(
+                            "AI_ONLY", None, user_question, embeddings,
+                            lambda: answer_with_internet_only(
+                                llm, user_question, placeholder=stream_target, embeddings=embeddings,
+                                conversation=get_conversation_memory().context()
+                            )
+                        )
+                
+                answer_placeholder.markdown(f"""
                 <div style="background: rgba(255,255,255,0.05); padding: 1.5rem; border-radius: 10px; border-left: 4px solid #667eea;">
                     {answer}
                 </div>
                 """, unsafe_allow_html=True)
+                show_generation_stats()
+                record_turn(user_question, answer, llm)
                 
                 col_sources, col_web = st.columns(2)
                 
@@ -1399,15 +2967,43 @@ else:
                 else:
                     st.success(f"✅ Crawled **{len(crawled_data)}** pages!")
                     
+                    stage_totals = {"fetch": 0.0, "parse": 0.0, "extract": 0.0}
+                    for page_data in crawled_data.values():
+                        for stage, seconds in page_data.get("timings", {}).items():
+                            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+                    not_modified = sum(1 for page_data in crawled_data.values() if page_data.get("not_modified"))
+                    st.caption(
+                        f"⏱️ Fetch {stage_totals['fetch']:.2f}s • "
+                        f"Parse ({HTML_PARSER}) {stage_totals['parse']:.2f}s • "
+                        f"Extract {stage_totals['extract']:.2f}s • "
+                        f"♻️ {not_modified} unchanged (304)"
+                    )
+                    
                     texts_dict = {}
                     for url, page_data in crawled_data.items():
                         page_name = f"{urlparse(url).netloc} - {page_data['title']}"
                         texts_dict[page_name] = page_data['content']
                     
-                    with st.spinner("🔗 Creating embeddings..."):
-                        vector_store = split_and_embed_texts(texts_dict, embeddings)
+                    fingerprint = compute_corpus_fingerprint(
+                        {name: hash_bytes(text.encode()) for name, text in texts_dict.items()}
+                    )
+                    registry = get_index_registry()
+                    vector_store, _ = registry.acquire(fingerprint, st.session_state.session_id)
+                    
+                    if vector_store is None:
+                        vector_store, _ = load_cached_index(fingerprint, embeddings)
+                    
+                    if vector_store is None:
+                        with st.spinner("🔗 Creating embeddings..."):
+                            vector_store = persist_index(
+                                fingerprint, split_and_embed_texts(texts_dict, embeddings), {}, embeddings
+                            )
+                    
+                    vector_store, _ = registry.acquire(fingerprint, st.session_state.session_id, vector_store)
                     
                     st.session_state.vector_store = vector_store
+                    st.session_state.index_fingerprint = fingerprint
+                    st.session_state.pop("index_manifest", None)
                     st.session_state.crawled_websites = {website_url: crawled_data}
                     st.session_state.mode = "WEB_CRAWL"
                     
@@ -1445,27 +3041,39 @@ else:
                 try:
                     st.session_state.question_count += 1
                     
-                    with st.spinner("🔍 Searching crawled content..."):
-                        answer, docs, _ = answer_with_pdf_context(
-                            st.session_state.vector_store,
-                            llm,
-                            user_question,
-                            include_internet=False
-                        )
-                    
-                    st.session_state.chat_history.append((user_question, answer))
+                    st.session_state.pop("generation_stats", None)
                     
+                    # Display answer (tokens stream into the placeholder)
                     st.markdown("""
                     <div class="answer-section">
                         <h3 style="margin-top: 0;">📝 Answer</h3>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    st.markdown(f"""
+                    answer_placeholder = st.empty()
+                    stream_target = answer_placeholder if st.session_state.get("stream_answers", True) else None
+                    
+                    with st.spinner("🔍 Searching crawled content..."):
+                        answer, docs, _ = answer_with_cache(
+                            "WEB_CRAWL", st.session_state.get("index_fingerprint"), user_question, embeddings,
+                            lambda: answer_with_pdf_context(
+                                st.session_state.vector_store,
+                                llm,
+                                user_question,
+                                include_internet=False,
+                                placeholder=stream_target,
+                                embeddings=embeddings,
+                                conversation=get_conversation_memory().context()
+                            )
+                        )
+                    
+                    answer_placeholder.markdown(f"""
                     <div style="background: rgba(255,255,255,0.05); padding: 1.5rem; border-radius: 10px; border-left: 4px solid #667eea;">
                         {answer}
                     </div>
                     """, unsafe_allow_html=True)
+                    show_generation_stats()
+                    record_turn(user_question, answer, llm)
                     
                     if docs:
                         with st.expander("📄 Source Pages"):
@@ -0,0 +1,172 @@
+"""
+Crawl benchmark against a local fixture site.
+
+Serves a generated campus-like site from a stdlib ThreadingHTTPServer (with an
+optional per-request delay to stand in for network latency) and compares the
+original serial crawl (pop(0) frontier, page fetched twice, fixed 0.5 s sleep)
+with the concurrent engine in crawler.py.
+
+    python benchmarks/crawl_benchmark.py --pages 50 --latency 0.05
+"""
+
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urljoin
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+from bs4 import BeautifulSoup
+
+from crawler import USER_AGENT, CrawlerHttpClient, clean_text, crawl, is_allowed_url, is_valid_url
+
+
+def make_handler(page_count: int, links_per_page: int, latency: float):
+    """Request handler for a site of page_count pages, each linking to the next links_per_page."""
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so the pooled client can reuse connections
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            try:
+                number = 0 if self.path == "/" else int(self.path.strip("/").split("-")[1])
+            except (IndexError, ValueError):
+                number = -1
+
+            if not 0 <= number < page_count:
+                self.send_error(404)
+                return
+
+            time.sleep(latency)
+            etag = f'"page-{number}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            links = "".join(
+                f'<li><a href="/page-{(number + step) % page_count}">Page {(number + step) % page_count}</a></li>'
+                for step in range(1, links_per_page + 1)
+            )
+            body = (
+                f"<html><head><title>Campus page {number}</title><style>p {{}}</style></head><body>"
+                f"<h1>Department {number}</h1>"
+                f"<p>{'Course listings, fees, timetables and facilities. ' * 40}</p>"
+                f"<ul>{links}</ul></body></html>"
+            ).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def serial_crawl(base_url: str, max_pages: int, max_depth: int, delay: float) -> dict:
+    """The original crawl_website loop, without the Streamlit placeholders."""
+    crawled_pages = {}
+    visited_urls = set()
+    to_visit = [(base_url, 0)]
+    headers = {"User-Agent": USER_AGENT}
+
+    while to_visit and len(crawled_pages) < max_pages:
+        current_url, depth = to_visit.pop(0)
+
+        if current_url in visited_urls or depth > max_depth:
+            continue
+
+        visited_urls.add(current_url)
+
+        try:
+            response = requests.get(current_url, headers=headers, timeout=10)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.content, "html.parser")
+            for script in soup(["script", "style"]):
+                script.decompose()
+            crawled_pages[current_url] = {
+                "title": soup.title.string if soup.title else "Untitled",
+                "content": clean_text(soup.get_text()),
+                "depth": depth
+            }
+
+            if depth < max_depth and len(crawled_pages) < max_pages:
+                # The original fetched every page a second time to collect links
+                response = requests.get(current_url, headers=headers, timeout=5)
+                soup = BeautifulSoup(response.content, "html.parser")
+                for link in soup.find_all("a", href=True):
+                    absolute_url = urljoin(current_url, link["href"])
+                    if (is_valid_url(absolute_url) and is_allowed_url(absolute_url, base_url) and
+                            absolute_url not in visited_urls):
+                        to_visit.append((absolute_url, depth + 1))
+        except requests.RequestException:
+            pass
+
+        time.sleep(delay)
+
+    return crawled_pages
+
+
+def run(name: str, func) -> tuple:
+    started = time.perf_counter()
+    pages = func()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<38} {len(pages):>5} pages {elapsed:>8.2f}s {len(pages) / elapsed:>8.1f} pages/s")
+    return pages, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="max_pages for each crawl")
+    parser.add_argument("--depth", type=int, default=5, help="max_depth for each crawl")
+    parser.add_argument("--site-size", type=int, default=200, help="pages in the fixture site")
+    parser.add_argument("--links", type=int, default=10, help="links per fixture page")
+    parser.add_argument("--latency", type=float, default=0.05, help="server delay per request (s)")
+    parser.add_argument("--serial-delay", type=float, default=0.5, help="fixed sleep of the serial crawl (s)")
+    parser.add_argument("--rps", type=float, default=20.0, help="per-host token-bucket rate for the engine")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.site_size, args.links, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    print(f"Fixture site {base_url} • {args.site_size} pages • {args.latency * 1000:.0f} ms latency\n")
+    try:
+        _, serial_seconds = run(
+            f"serial (sleep {args.serial_delay}s)",
+            lambda: serial_crawl(base_url, args.pages, args.depth, args.serial_delay)
+        )
+        for workers in (1, 4, 8):
+            _, seconds = run(
+                f"engine {workers} worker(s), {args.rps:g} req/s",
+                lambda: crawl(
+                    base_url, CrawlerHttpClient(), max_pages=args.pages, max_depth=args.depth,
+                    max_workers=workers, per_host_limit=workers, requests_per_second=args.rps
+                )
+            )
+            print(f"{'':<38} speed-up vs serial: {serial_seconds / seconds:.1f}x")
+
+        # A second crawl with the same client revalidates every page with If-None-Match (304s)
+        client = CrawlerHttpClient()
+        crawl(base_url, client, max_pages=args.pages, max_depth=args.depth, requests_per_second=args.rps)
+        run("engine 8 workers, revalidating (304)", lambda: crawl(
+            base_url, client, max_pages=args.pages, max_depth=args.depth, requests_per_second=args.rps
+        ))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
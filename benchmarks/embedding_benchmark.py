@@ -0,0 +1,180 @@
+"""
+Embedding backend benchmark: PyTorch vs ONNX Runtime.
+
+Loads the embedding model once per backend configuration, each in a fresh
+process so memory figures do not bleed into each other, and reports load
+time, batch throughput, single-query latency and peak memory. It then checks
+that the backends agree: cosine similarity between their vectors for the
+same text, and overlap of the top-k chunks each retrieves for the same
+questions (exact search, as on a flat index).
+
+    python benchmarks/embedding_benchmark.py --configs torch onnx:none onnx:avx2
+    python benchmarks/embedding_benchmark.py --corpus notes.txt --model ./models/minilm
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from embedding_backend import quantized_onnx_file
+
+DEPARTMENTS = ["Computer Science", "Mechanical Engineering", "Business Administration", "Biotechnology",
+               "Civil Engineering", "Economics", "Psychology", "Architecture", "Mathematics", "Physics"]
+TOPICS = ["tuition fees", "hostel accommodation", "scholarship deadlines", "library hours", "lab safety rules",
+          "exam timetable", "internship placements", "sports facilities", "canteen menu", "bus routes"]
+TEMPLATES = [
+    "The {department} department publishes its {topic} at the start of each semester, with changes announced by email.",
+    "Students in {department} should contact the office on floor {floor} about {topic} before week {week}.",
+    "For {topic}, {department} students pay or register by {day}; late requests incur a fee of {amount} rupees.",
+    "{department} updated the {topic} policy in {year}: first-year students now get priority for {count} places.",
+]
+QUESTIONS = [
+    "When does {department} announce the {topic}?",
+    "Who do {department} students contact about {topic}?",
+    "What is the deadline for {topic} in {department}?",
+    "How did the {topic} policy change for {department}?",
+]
+
+
+def synthetic_texts(count: int, templates: list, rng: random.Random) -> list:
+    """Campus-notice style sentences built from random departments, topics and numbers."""
+    return [
+        rng.choice(templates).format(
+            department=rng.choice(DEPARTMENTS), topic=rng.choice(TOPICS), floor=rng.randint(1, 6),
+            week=rng.randint(2, 14), day=rng.choice(["Monday", "Wednesday", "Friday"]),
+            amount=rng.randrange(500, 20000, 250), year=rng.randint(2019, 2025), count=rng.randint(20, 400)
+        )
+        for _ in range(count)
+    ]
+
+
+def load_corpus(path: Path, count: int) -> list:
+    """Non-empty paragraphs of a text file, at most count of them."""
+    paragraphs = [block.strip() for block in path.read_text(errors="ignore").split("\n\n")]
+    return [paragraph for paragraph in paragraphs if len(paragraph) > 20][:count]
+
+
+def model_kwargs(config: str, model: str) -> dict:
+    """SentenceTransformer kwargs for "torch", "onnx:none" or "onnx:<quantization>"."""
+    backend, _, quantization = config.partition(":")
+    kwargs = {"device": "cpu", "backend": backend}
+
+    if backend == "onnx" and quantization not in ("", "none"):
+        kwargs["model_kwargs"] = {"file_name": quantized_onnx_file(model, quantization)}
+
+    return kwargs
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1_048_576 if sys.platform == "darwin" else peak / 1024
+
+
+def run_config(config: str, model: str, texts: list, questions: list, batch_size: int) -> dict:
+    """Load one backend configuration and time it (runs in its own process)."""
+    from sentence_transformers import SentenceTransformer
+
+    baseline_mb = peak_memory_mb()
+    started = time.perf_counter()
+    encoder = SentenceTransformer(model, **model_kwargs(config, model))
+    load_seconds = time.perf_counter() - started
+
+    # One warm-up batch, so lazy initialization is not billed to throughput
+    encoder.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)
+
+    started = time.perf_counter()
+    corpus = encoder.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    encode_seconds = time.perf_counter() - started
+
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        encoder.encode([question], normalize_embeddings=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "load_seconds": load_seconds,
+        "texts_per_second": len(texts) / encode_seconds,
+        "query_p50": float(np.percentile(latencies, 50)),
+        "query_p95": float(np.percentile(latencies, 95)),
+        "peak_mb": peak_memory_mb(),
+        "model_mb": peak_memory_mb() - baseline_mb,
+        "corpus": np.asarray(corpus, dtype=np.float32),
+        "questions": encoder.encode(questions, batch_size=batch_size, normalize_embeddings=True),
+    }
+
+
+def top_k(questions: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most similar chunks per question, best first."""
+    scores = questions @ corpus.T
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1)
+    return np.take_along_axis(best, order, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2",
+                        help="hub id or local model directory")
+    parser.add_argument("--configs", nargs="+", default=["torch", "onnx:avx2"],
+                        help="torch, onnx:none or onnx:<arm64|avx2|avx512|avx512_vnni>; the first is the reference")
+    parser.add_argument("--corpus", type=Path, help="text file split on blank lines (default: synthetic notices)")
+    parser.add_argument("--texts", type=int, default=2000, help="chunks to embed")
+    parser.add_argument("--questions", type=int, default=200, help="questions for latency and agreement")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--k", type=int, default=5, help="chunks retrieved per question")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = load_corpus(args.corpus, args.texts) if args.corpus else synthetic_texts(args.texts, TEMPLATES, rng)
+    questions = synthetic_texts(args.questions, QUESTIONS, rng)
+    print(f"{args.model} • {len(texts)} texts • {len(questions)} questions • batch {args.batch_size}\n")
+
+    results = {}
+    for config in args.configs:
+        # A fresh spawned process per backend keeps peak memory and imports separate
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results[config] = pool.submit(
+                run_config, config, args.model, texts, questions, args.batch_size
+            ).result()
+
+    reference = args.configs[0]
+    print(f"{'backend':<18} {'load':>7} {'texts/s':>9} {'query p50':>10} {'p95':>9} {'peak':>9} {'model':>9}")
+    for config, result in results.items():
+        print(
+            f"{config:<18} {result['load_seconds']:>6.1f}s {result['texts_per_second']:>9.0f} "
+            f"{result['query_p50']:>8.2f}ms {result['query_p95']:>7.2f}ms "
+            f"{result['peak_mb']:>7.0f}MB {result['model_mb']:>7.0f}MB"
+        )
+
+    print(f"\nAgreement with {reference} (top-{args.k} exact search):")
+    print(f"{'backend':<18} {'speed-up':>9} {'mean cos':>9} {'min cos':>9} {'top-1':>7} {'overlap@k':>10}")
+    base = results[reference]
+    base_top = top_k(base["questions"], base["corpus"], args.k)
+    for config, result in results.items():
+        if config == reference:
+            continue
+
+        cosines = np.sum(base["corpus"] * result["corpus"], axis=1)
+        other_top = top_k(result["questions"], result["corpus"], args.k)
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(base_top, other_top)])
+        print(
+            f"{config:<18} {result['texts_per_second'] / base['texts_per_second']:>8.2f}x "
+            f"{cosines.mean():>9.4f} {cosines.min():>9.4f} "
+            f"{np.mean(base_top[:, 0] == other_top[:, 0]):>7.1%} {overlap:>10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+FAISS index benchmark on random normalized vectors.
+
+Builds flat, IVF, IVF-PQ and HNSW indexes with vector_index.build_ann_index
+(the same parameters the app uses) and reports build time, size, per-query
+latency and recall@k against exact flat search. Vectors are drawn around
+random cluster centres and L2-normalized, like sentence embeddings.
+
+Each index is then written to disk and read back in memory and memory-mapped
+(vector_index.read_faiss_index), each in a fresh process and from a cold page
+cache, to compare load time, memory and query latency. Memory is the growth in resident (RSS) and private
+(USS) pages from before the load to after the first query; a mapped index
+shows up there as file-backed pages once the query touches them. Finally it checks that supports_removal only
+admits index types whose deletes keep LangChain's renumbered
+index_to_docstore_id mapping correct.
+
+    python benchmarks/index_benchmark.py --count 100000 --k 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import faiss
+import numpy as np
+
+import vector_index
+from vector_index import build_ann_index, faiss_index_bytes, read_faiss_index, supports_removal
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+
+def make_vectors(count: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """count L2-normalized float32 vectors; clusters=0 draws them uniformly on the sphere."""
+    vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+    if clusters:
+        centres = rng.standard_normal((clusters, dimension), dtype=np.float32) * 2
+        vectors += centres[rng.integers(0, clusters, count)]
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def time_queries(index, queries: np.ndarray, k: int) -> tuple:
+    """Search one query at a time, as the app does. Returns (labels, latencies in ms)."""
+    labels = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        _, labels[i:i + 1] = index.search(query.reshape(1, -1), k)
+        latencies[i] = (time.perf_counter() - started) * 1000
+
+    return labels, latencies
+
+
+def recall_at_k(labels: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the exact top-k neighbours found in the approximate top-k."""
+    k = truth.shape[1]
+    return sum(len(set(row) & set(exact)) for row, exact in zip(labels, truth)) / (len(truth) * k)
+
+
+def memory_mb() -> tuple:
+    """
+    (RSS, USS) of this process in MB from /proc/self/smaps_rollup, or NaN where unavailable.
+    Both include file-backed pages, so touched pages of a memory-mapped index are counted.
+    """
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0]) / 1024
+    except OSError:
+        return float("nan"), float("nan")
+    return fields["Rss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+
+def evict_from_page_cache(path: Path):
+    """Ask the kernel to drop a file's cached pages so the next read starts cold."""
+    if hasattr(os, "posix_fadvise"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def load_and_query(path: Path, mode: str, queries: np.ndarray, k: int) -> tuple:
+    """
+    Read an index with INDEX_MMAP=mode from a cold cache and time queries against it
+    (runs in its own process). Returns (labels, latencies, load ms, RSS growth MB,
+    USS growth MB), memory measured from before the load to after the first query.
+    """
+    faiss.omp_set_num_threads(1)
+    vector_index.INDEX_MMAP = mode
+    evict_from_page_cache(path)
+    rss_before, uss_before = memory_mb()
+
+    started = time.perf_counter()
+    index = read_faiss_index(path)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    first_labels, first_latency = time_queries(index, queries[:1], k)
+    rss_after, uss_after = memory_mb()
+    labels, latencies = time_queries(index, queries[1:], k)
+    return (
+        np.concatenate([first_labels, labels]), np.concatenate([first_latency, latencies]),
+        load_ms, rss_after - rss_before, uss_after - uss_before
+    )
+
+
+def removal_keeps_mapping(index_type: str, vectors: np.ndarray, rng: np.random.Generator) -> bool:
+    """
+    Delete vectors the way LangChain's FAISS.delete does (remove_ids, then renumber
+    index_to_docstore_id contiguously) and check that searching for a kept vector
+    still resolves to its own document.
+    """
+    index = build_ann_index(vectors, index_type)
+    if hasattr(index, "nprobe"):
+        index.nprobe = index.nlist
+    index_to_docstore_id = {i: f"doc-{i}" for i in range(len(vectors))}
+
+    removed = set(rng.choice(len(vectors), size=len(vectors) // 10, replace=False).tolist())
+    try:
+        index.remove_ids(np.array(sorted(removed), dtype=np.int64))
+    except RuntimeError:
+        return False
+    kept = [doc_id for i, doc_id in sorted(index_to_docstore_id.items()) if i not in removed]
+    index_to_docstore_id = dict(enumerate(kept))
+
+    probes = [i for i in rng.choice(len(vectors), size=50, replace=False).tolist() if i not in removed]
+    _, labels = index.search(vectors[probes], 1)
+    return all(
+        index_to_docstore_id.get(int(label)) == f"doc-{i}"
+        for i, label in zip(probes, labels[:, 0])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="vectors in each index")
+    parser.add_argument("--dim", type=int, default=384, help="vector dimension (384 = MiniLM)")
+    parser.add_argument("--clusters", type=int, default=1000, help="cluster centres, 0 for uniform vectors")
+    parser.add_argument("--queries", type=int, default=500, help="queries per index")
+    parser.add_argument("--k", type=int, default=10, help="neighbours per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = make_vectors(args.count + args.queries, args.dim, args.clusters, rng)
+    vectors, queries = data[:args.count], data[args.count:]
+    faiss.omp_set_num_threads(1)
+
+    print(f"{args.count} vectors • d={args.dim} • {args.clusters} clusters • "
+          f"{args.queries} queries • k={args.k}\n")
+    print(f"{'index':<8} {'build':>8} {'size':>10} {'p50':>9} {'p95':>9} {'recall@k':>9}")
+
+    truth = None
+    for index_type in INDEX_TYPES:
+        started = time.perf_counter()
+        index = build_ann_index(vectors, index_type)
+        build_seconds = time.perf_counter() - started
+
+        labels, latencies = time_queries(index, queries, args.k)
+        if truth is None:
+            truth = labels
+
+        print(
+            f"{index_type:<8} {build_seconds:>7.1f}s {faiss_index_bytes(index) / 1_048_576:>8.1f}MB "
+            f"{np.percentile(latencies, 50):>7.3f}ms {np.percentile(latencies, 95):>7.3f}ms "
+            f"{recall_at_k(labels, truth):>9.3f}"
+        )
+
+    print("\nIn-memory vs memory-mapped (cold page cache):")
+    print(f"{'index':<8} {'mode':<7} {'load':>9} {'rss':>8} {'uss':>8} {'first':>9} {'p50':>9} {'p95':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for index_type in INDEX_TYPES:
+            path = Path(directory) / f"{index_type}.faiss"
+            faiss.write_index(build_ann_index(vectors, index_type), str(path))
+
+            results = {}
+            for mode in ("never", "always"):
+                # A fresh spawned process per load, so freed build memory is not reused and hidden
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    labels, latencies, load_ms, rss_mb, uss_mb = pool.submit(
+                        load_and_query, path, mode, queries, args.k
+                    ).result()
+                results[mode] = labels
+                print(
+                    f"{index_type:<8} {'mmap' if mode == 'always' else 'memory':<7} {load_ms:>7.1f}ms "
+                    f"{rss_mb:>6.1f}MB {uss_mb:>6.1f}MB {latencies[0]:>7.3f}ms {np.percentile(latencies, 50):>7.3f}ms "
+                    f"{np.percentile(latencies, 95):>7.3f}ms"
+                )
+            assert (results["never"] == results["always"]).all(), f"mmapped {index_type} results differ"
+
+    print("\nDelete-then-search (LangChain renumbering):")
+    sample = vectors[:min(args.count, 20_000)]
+    for index_type in INDEX_TYPES:
+        correct = removal_keeps_mapping(index_type, sample, rng)
+        removable = supports_removal(build_ann_index(sample[:1000], index_type))
+        status = "ok" if correct == removable else "MISMATCH"
+        print(f"  {index_type:<8} mapping {'kept' if correct else 'broken':<7} "
+              f"supports_removal={removable!s:<6} {status}")
+        assert correct == removable, f"supports_removal is wrong for {index_type}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Follow-up detection for Campus Buddy's conversation memory.
+
+A follow-up leans on earlier turns, so it must not be answered from the shared
+answer cache or the FAQ router. Only short questions count: ones that open
+with a conjunction ("and for MBA?") or whose only subject is a pronoun
+("how much does it cost?"). Standalone questions that merely contain "there"
+or "this" ("is there a library?", "what is this year's fee?") do not.
+"""
+
+import re
+
+FOLLOW_UP_WORD_RE = re.compile(r'[a-z0-9]+')
+FOLLOW_UP_MAX_WORDS = 8
+ELLIPTICAL_MAX_WORDS = 6
+ELLIPTICAL_OPENERS = ("and", "or", "but", "also", "then", "what about", "how about")
+FOLLOW_UP_PRONOUNS = frozenset(
+    "it its they them their theirs these those this that he she him his her above previous same".split()
+)
+# Question phrasing and function words; everything else counts as a content term
+FOLLOW_UP_FILLER = frozenset(
+    "a an the is are was were be been do does did can could will would should may might "
+    "what which who whom whose when where why how much many there here me my more about tell "
+    "explain mean else again please of in on at to for from with by and or but also then so any".split()
+)
+
+
+def looks_like_follow_up(question: str) -> bool:
+    """
+    Whether a question only makes sense after earlier turns: a short elliptical question,
+    or a short question whose subject is a pronoun and that names at most one thing of its
+    own (the attribute asked about, as in "what is its deadline?").
+    """
+    # Single letters are possessive or contraction debris ("year's", "what's")
+    words = [word for word in FOLLOW_UP_WORD_RE.findall(question.lower()) if len(word) > 1 or word.isdigit()]
+    if not words or len(words) > FOLLOW_UP_MAX_WORDS:
+        return False
+
+    text = " ".join(words)
+    if len(words) <= ELLIPTICAL_MAX_WORDS and any(
+        text == opener or text.startswith(opener + " ") for opener in ELLIPTICAL_OPENERS
+    ):
+        return True
+
+    if not FOLLOW_UP_PRONOUNS.intersection(words):
+        return False
+
+    content = [word for word in words if word not in FOLLOW_UP_PRONOUNS and word not in FOLLOW_UP_FILLER]
+    return len(content) <= 1
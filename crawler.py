@@ -0,0 +1,329 @@
+"""
+Concurrent website crawler for Campus Buddy.
+
+Kept free of Streamlit so the crawl engine can be imported and benchmarked on
+its own; app.py wraps it with progress placeholders and a process-wide client.
+"""
+
+import re
+import threading
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+def is_valid_url(url: str) -> bool:
+    """Validate URL format."""
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except:
+        return False
+
+
+def is_allowed_url(url: str, base_domain: str) -> bool:
+    """Check if URL belongs to the same domain."""
+    try:
+        parsed_url = urlparse(url)
+        parsed_base = urlparse(base_domain)
+        return parsed_url.netloc == parsed_base.netloc
+    except:
+        return False
+
+
+def clean_text(text: str) -> str:
+    """Clean extracted text from HTML."""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,:;!?()-]', '', text)
+    return text.strip()
+
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def page_size(page: dict) -> int:
+    """Approximate size of a parsed page in characters: title, text and links."""
+    return len(page["title"] or "") + len(page["text"]) + sum(len(link) for link in page["links"])
+
+
+class CrawlerHttpClient:
+    """
+    Pooled, keep-alive HTTP client with retries and ETag/Last-Modified revalidation.
+    Parsed pages kept for 304 responses are bounded by count and by total size.
+    """
+
+    def __init__(self, pool_size: int = 16, retries: int = 3, backoff: float = 0.5,
+                 max_validators: int = 5000, max_page_chars: int = 32_000_000):
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # urllib3 advertises "br" only when a brotli decoder is installed
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": ACCEPT_ENCODING,
+        })
+
+        self.validators = OrderedDict()
+        self.max_validators = max_validators
+        self.max_page_chars = max_page_chars
+        self.page_chars = 0
+        self.lock = threading.Lock()
+
+    def get(self, url: str, timeout: int = 10, conditional: bool = True) -> requests.Response:
+        """GET a URL, revalidating against the last seen ETag/Last-Modified."""
+        headers = {}
+        if conditional:
+            with self.lock:
+                cached = self.validators.get(url)
+            if cached:
+                if cached["etag"]:
+                    headers["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+        return self.session.get(url, headers=headers, timeout=timeout)
+
+    def cached_page(self, url: str):
+        """Return the parsed page stored for a URL, if any."""
+        with self.lock:
+            cached = self.validators.get(url)
+            if cached is None:
+                return None
+            self.validators.move_to_end(url)
+            return cached["page"]
+
+    def remember(self, url: str, response: requests.Response, page: dict):
+        """Store validators and the parsed page so a later 304 can reuse it."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if not etag and not last_modified:
+            return
+
+        size = page_size(page)
+        with self.lock:
+            previous = self.validators.pop(url, None)
+            if previous is not None:
+                self.page_chars -= previous["size"]
+            # A page that alone exceeds the budget would only flush everything else
+            if size > self.max_page_chars:
+                return
+
+            self.validators[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "page": page,
+                "size": size
+            }
+            self.page_chars += size
+            while self.validators and (
+                len(self.validators) > self.max_validators or self.page_chars > self.max_page_chars
+            ):
+                _, evicted = self.validators.popitem(last=False)
+                self.page_chars -= evicted["size"]
+
+
+def fetch_and_parse_page(url: str, client: CrawlerHttpClient, timeout: int = 10) -> dict:
+    """Fetch a webpage once and return its title, cleaned text, links and stage timings."""
+    timings = {}
+
+    started = time.perf_counter()
+    response = client.get(url, timeout=timeout)
+
+    if response.status_code == 304:
+        cached = client.cached_page(url)
+        if cached is not None:
+            timings["fetch"] = time.perf_counter() - started
+            return {**cached, "timings": timings, "not_modified": True}
+        response = client.get(url, timeout=timeout, conditional=False)
+
+    response.raise_for_status()
+    timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    soup = BeautifulSoup(response.content, HTML_PARSER)
+    timings["parse"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    links = []
+    for link in soup.find_all('a', href=True):
+        absolute_url = urljoin(url, link['href'])
+        if is_valid_url(absolute_url):
+            links.append(absolute_url)
+
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    title = soup.title.string if soup.title else "Untitled"
+    text = clean_text(soup.get_text())
+    timings["extract"] = time.perf_counter() - started
+
+    page = {
+        "title": title,
+        "text": text,
+        "links": links
+    }
+    client.remember(url, response, page)
+
+    return {**page, "timings": timings, "not_modified": False}
+
+
+CRAWL_MAX_WORKERS = 8
+CRAWL_PER_HOST_LIMIT = 4
+CRAWL_REQUESTS_PER_SECOND = 4.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests to a single host."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait_time = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+
+class HostLimiter:
+    """Per-host concurrency cap combined with a token-bucket request rate."""
+
+    def __init__(self, per_host_limit: int, requests_per_second: float):
+        self.per_host_limit = per_host_limit
+        self.requests_per_second = requests_per_second
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _get(self, host: str) -> tuple:
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = (
+                    threading.BoundedSemaphore(self.per_host_limit),
+                    TokenBucket(self.requests_per_second, capacity=self.per_host_limit),
+                )
+            return self.hosts[host]
+
+    def run(self, url: str, func, *args, **kwargs):
+        """Call func once the host of url has a free slot and a token."""
+        semaphore, bucket = self._get(urlparse(url).netloc)
+        with semaphore:
+            bucket.acquire()
+            return func(*args, **kwargs)
+
+
+def crawl_page(url: str, depth: int, base_url: str, max_depth: int,
+               limiter: HostLimiter, client: CrawlerHttpClient) -> tuple:
+    """Fetch and parse one page inside a worker thread."""
+    try:
+        page = limiter.run(url, fetch_and_parse_page, url, client)
+    except Exception:
+        return None, []
+
+    if not page["text"].strip():
+        return None, []
+
+    links = []
+    if depth < max_depth:
+        links = [link for link in page["links"] if is_allowed_url(link, base_url)]
+
+    return page, links
+
+
+def crawl(base_url: str, client: CrawlerHttpClient, max_pages: int = 10, max_depth: int = 2,
+          max_workers: int = CRAWL_MAX_WORKERS,
+          per_host_limit: int = CRAWL_PER_HOST_LIMIT,
+          requests_per_second: float = CRAWL_REQUESTS_PER_SECOND,
+          progress_callback=None) -> dict:
+    """
+    Crawl a website concurrently (breadth-first) and return {url: page}.
+    progress_callback(crawled, max_pages, url) is called from the calling thread
+    after each accepted page.
+    """
+    crawled_pages = {}
+    seen_urls = {base_url}
+    frontier = deque([(base_url, 0)])
+    in_flight = {}
+    limiter = HostLimiter(per_host_limit, requests_per_second)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while (frontier or in_flight) and len(crawled_pages) < max_pages:
+            # Never keep more pages in flight than we could still accept
+            while (frontier and len(in_flight) < max_workers and
+                   len(crawled_pages) + len(in_flight) < max_pages):
+                url, depth = frontier.popleft()
+                future = executor.submit(crawl_page, url, depth, base_url, max_depth, limiter, client)
+                in_flight[future] = (url, depth)
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                url, depth = in_flight.pop(future)
+
+                try:
+                    page, links = future.result()
+                except Exception:
+                    continue
+
+                if page is None or len(crawled_pages) >= max_pages:
+                    continue
+
+                crawled_pages[url] = {
+                    "title": page["title"],
+                    "content": page["text"],
+                    "depth": depth,
+                    "timings": page["timings"],
+                    "not_modified": page["not_modified"]
+                }
+
+                for link in links:
+                    if link not in seen_urls:
+                        seen_urls.add(link)
+                        frontier.append((link, depth + 1))
+
+                if progress_callback:
+                    progress_callback(len(crawled_pages), max_pages, url)
+
+        for future in in_flight:
+            future.cancel()
+
+    return crawled_pages
@@ -0,0 +1,31 @@
+"""
+Embedding backend helpers for Campus Buddy.
+
+Kept free of Streamlit so the PyTorch and ONNX backends can be benchmarked on
+their own; app.py reads the backend settings and builds the model from them.
+"""
+
+from pathlib import Path
+
+
+def quantized_onnx_file(model_source: str, quantization: str) -> str:
+    """
+    Return the int8 ONNX file for the model, relative to the model directory.
+    Files are named after the weights dtype of the quantization config, as
+    sentence-transformers exports them (avx2 quantizes to unsigned int8, so it is
+    model_quint8_avx2.onnx). The hub all-MiniLM-L6-v2 ships these files; for a local
+    model directory the file is exported once with dynamic quantization.
+    """
+    from optimum.onnxruntime import AutoQuantizationConfig
+
+    config = getattr(AutoQuantizationConfig, quantization)(is_static=False)
+    file_name = f"onnx/model_{config.weights_dtype.name.lower()}_{quantization}.onnx"
+    model_dir = Path(model_source)
+
+    if model_dir.is_dir() and not (model_dir / file_name).exists():
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        onnx_model = SentenceTransformer(model_source, device="cpu", backend="onnx")
+        export_dynamic_quantized_onnx_model(onnx_model, quantization, model_source)
+
+    return file_name
@@ -0,0 +1,314 @@
+"""
+Hybrid dense + BM25 vector store for Campus Buddy, and the registry that shares
+one store per corpus across sessions.
+
+Streamlit re-executes app.py as a fresh __main__ module on every rerun, so
+classes defined there are new objects each time: stores built on one rerun
+fail isinstance checks on the next and cannot be pickled. Keeping the store
+classes in an importable module gives them one stable identity per process
+and a stable pickle path for cached lexical indexes.
+"""
+
+import pickle
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from vector_index import faiss_index_bytes
+
+
+LEXICAL_TOKEN_RE = re.compile(r'[a-z0-9]+')
+DIGIT_GROUP_RE = re.compile(r'(?<=\d),(?=\d{3})')
+LEXICAL_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it of on or the this to was what when "
+    "where which who why will with you your".split()
+)
+
+
+def lexical_tokens(text: str) -> list:
+    """Lowercase alphanumeric terms, with digit grouping removed so 50,000 matches 50000."""
+    return [
+        token for token in LEXICAL_TOKEN_RE.findall(DIGIT_GROUP_RE.sub("", text.lower()))
+        if token not in LEXICAL_STOPWORDS
+    ]
+
+
+def packed_array(typecode: str, values: np.ndarray) -> array:
+    packed = array(typecode)
+    packed.frombytes(values.astype(np.dtype(typecode)).tobytes())
+    return packed
+
+
+class LexicalIndex:
+    """
+    Compact BM25 inverted index over chunk texts.
+    Postings are packed uint32 chunk numbers with uint16 term counts; removed chunks
+    are tombstoned and squeezed out once they make up half of the index.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = []
+        self.positions = {}
+        self.lengths = array("I")
+        self.alive = bytearray()
+        self.postings = {}
+        self.live_count = 0
+        self.live_length = 0
+
+    @property
+    def nbytes(self) -> int:
+        postings = sum(
+            len(docs) * docs.itemsize + len(counts) * counts.itemsize
+            for docs, counts in self.postings.values()
+        )
+        return postings + len(self.lengths) * self.lengths.itemsize + len(self.alive)
+
+    def add(self, items):
+        """Index (doc_id, text) pairs."""
+        for doc_id, text in items:
+            counts = Counter(lexical_tokens(text))
+            number = len(self.doc_ids)
+            length = sum(counts.values())
+
+            self.doc_ids.append(doc_id)
+            self.positions[doc_id] = number
+            self.lengths.append(length)
+            self.alive.append(1)
+            self.live_count += 1
+            self.live_length += length
+
+            for term, count in counts.items():
+                docs, term_counts = self.postings.setdefault(term, (array("I"), array("H")))
+                docs.append(number)
+                term_counts.append(min(count, 65535))
+
+    def remove(self, doc_ids):
+        """Drop chunks by doc_id."""
+        for doc_id in doc_ids:
+            number = self.positions.pop(doc_id, None)
+            if number is None:
+                continue
+            self.alive[number] = 0
+            self.live_count -= 1
+            self.live_length -= self.lengths[number]
+
+        if len(self.doc_ids) > 2 * max(self.live_count, 1):
+            self.compact()
+
+    def compact(self):
+        """Rebuild postings without tombstoned chunks."""
+        alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        renumber = np.cumsum(alive) - 1
+        postings = {}
+
+        for term, (docs, term_counts) in self.postings.items():
+            docs = np.frombuffer(docs, dtype=np.uint32)
+            keep = alive[docs]
+            if keep.any():
+                postings[term] = (
+                    packed_array("I", renumber[docs[keep]]),
+                    packed_array("H", np.frombuffer(term_counts, dtype=np.uint16)[keep])
+                )
+
+        self.postings = postings
+        self.doc_ids = [doc_id for doc_id, live in zip(self.doc_ids, alive) if live]
+        self.positions = {doc_id: number for number, doc_id in enumerate(self.doc_ids)}
+        self.lengths = packed_array("I", np.frombuffer(self.lengths, dtype=np.uint32)[alive])
+        self.alive = bytearray(b"\x01" * len(self.doc_ids))
+
+    def search(self, query: str, k: int) -> list:
+        """Return up to k (doc_id, bm25_score) pairs, best first."""
+        terms = set(lexical_tokens(query)) & self.postings.keys()
+        if not terms or not self.live_count:
+            return []
+
+        alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(self.lengths, dtype=np.uint32)
+        norm = self.k1 * (1 - self.b + self.b * lengths / (self.live_length / self.live_count))
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+
+        for term in terms:
+            docs, term_counts = self.postings[term]
+            docs = np.frombuffer(docs, dtype=np.uint32)
+            term_counts = np.frombuffer(term_counts, dtype=np.uint16).astype(np.float32)
+
+            doc_freq = int(alive[docs].sum())
+            idf = np.log(1 + (self.live_count - doc_freq + 0.5) / (doc_freq + 0.5))
+            scores[docs] += idf * term_counts * (self.k1 + 1) / (term_counts + norm[docs])
+
+        scores[~alive] = 0
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[number], float(scores[number])) for number in top if scores[number] > 0]
+
+
+class HybridFAISS(FAISS):
+    """
+    FAISS store with a LexicalIndex over the same chunks, kept in sync on add and
+    delete and carried along when the store is serialized or cached.
+    """
+
+    _lexical = None
+    memory_mapped = False
+
+    @property
+    def lexical_index(self) -> LexicalIndex:
+        if self._lexical is None:
+            self._lexical = LexicalIndex()
+            self._lexical.add(
+                (doc_id, self.docstore.search(doc_id).page_content)
+                for doc_id in self.index_to_docstore_id.values()
+            )
+        return self._lexical
+
+    @classmethod
+    def from_embeddings(cls, text_embeddings, embedding, metadatas=None, ids=None, **kwargs):
+        store = super().from_embeddings(text_embeddings, embedding, metadatas=metadatas, ids=ids, **kwargs)
+        store.lexical_index  # build the lexical side together with the vectors
+        return store
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, **kwargs):
+        text_embeddings = list(text_embeddings)
+        lexical_index = self.lexical_index
+        added_ids = super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+        lexical_index.add(zip(added_ids, (text for text, _ in text_embeddings)))
+        return added_ids
+
+    def delete(self, ids=None, **kwargs):
+        lexical_index = self.lexical_index
+        result = super().delete(ids, **kwargs)
+        lexical_index.remove(ids or [])
+        return result
+
+    def serialize_to_bytes(self) -> bytes:
+        return pickle.dumps((super().serialize_to_bytes(), self.lexical_index))
+
+    @classmethod
+    def deserialize_from_bytes(cls, serialized: bytes, embeddings, **kwargs):
+        store_bytes, lexical_index = pickle.loads(serialized)
+        store = super().deserialize_from_bytes(store_bytes, embeddings, **kwargs)
+        store._lexical = lexical_index
+        return store
+
+
+def clone_vector_store(vector_store: FAISS, embeddings) -> FAISS:
+    """Deep-copy a FAISS store so a shared index is never mutated in place."""
+    return type(vector_store).deserialize_from_bytes(
+        vector_store.serialize_to_bytes(),
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
+
+
+def estimate_index_bytes(vector_store: FAISS) -> tuple:
+    """
+    Approximate memory of a FAISS store as (resident_bytes, mapped_bytes). A memory-mapped
+    index lives in the shared page cache, so its size is reported as mapped, not resident.
+    """
+    text_bytes = sum(
+        len(vector_store.docstore.search(doc_id).page_content.encode())
+        for doc_id in vector_store.index_to_docstore_id.values()
+    )
+    lexical_bytes = vector_store.lexical_index.nbytes if isinstance(vector_store, HybridFAISS) else 0
+    index_bytes = faiss_index_bytes(vector_store.index)
+
+    if getattr(vector_store, "memory_mapped", False):
+        return text_bytes + lexical_bytes, index_bytes
+    return index_bytes + text_bytes + lexical_bytes, 0
+
+
+class IndexRegistry:
+    """
+    Process-wide vector stores keyed by corpus fingerprint, so sessions working on the
+    same corpus share one index. Each session holds at most one reference; references
+    go stale after idle_seconds without a heartbeat, and unreferenced indexes are dropped
+    once they have been idle as long.
+    """
+
+    def __init__(self, idle_seconds: int):
+        self.idle_seconds = idle_seconds
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _release(self, session_id: str):
+        for entry in self.entries.values():
+            entry["sessions"].pop(session_id, None)
+
+    def _evict_idle(self, now: float):
+        for fingerprint in list(self.entries):
+            entry = self.entries[fingerprint]
+            for session_id in [sid for sid, seen in entry["sessions"].items() if now - seen > self.idle_seconds]:
+                del entry["sessions"][session_id]
+            if not entry["sessions"] and now - entry["last_used"] > self.idle_seconds:
+                del self.entries[fingerprint]
+
+    def acquire(self, fingerprint: str, session_id: str, vector_store: FAISS = None, manifest: dict = None) -> tuple:
+        """
+        Reference the shared index for fingerprint from session_id, registering vector_store
+        if there is none yet. Returns (vector_store, manifest), or (None, None) on a miss.
+        """
+        now = time.time()
+
+        with self.lock:
+            self._evict_idle(now)
+            entry = self.entries.get(fingerprint)
+            if entry is not None or vector_store is None:
+                return self._reference(entry, session_id, now)
+
+        # Only a miss is sized, outside the lock; the docstore walk is linear in the chunk count
+        resident_bytes, mapped_bytes = estimate_index_bytes(vector_store)
+
+        with self.lock:
+            # Another session may have registered the same corpus in the meantime
+            entry = self.entries.get(fingerprint)
+            if entry is None:
+                entry = self.entries[fingerprint] = {
+                    "store": vector_store,
+                    "manifest": manifest or {},
+                    "bytes": resident_bytes,
+                    "mapped_bytes": mapped_bytes,
+                    "sessions": {},
+                    "last_used": now
+                }
+            return self._reference(entry, session_id, now)
+
+    def _reference(self, entry: dict, session_id: str, now: float) -> tuple:
+        if entry is None:
+            return None, None
+        self._release(session_id)
+        entry["sessions"][session_id] = now
+        entry["last_used"] = now
+        return entry["store"], entry["manifest"]
+
+    def touch(self, fingerprint: str, session_id: str) -> bool:
+        """Heartbeat from a session still using fingerprint; False if the index was evicted."""
+        now = time.time()
+
+        with self.lock:
+            self._evict_idle(now)
+            entry = self.entries.get(fingerprint)
+            if entry is None:
+                return False
+            entry["sessions"][session_id] = now
+            entry["last_used"] = now
+            return True
+
+    def release(self, session_id: str):
+        """Drop every reference held by session_id."""
+        with self.lock:
+            self._release(session_id)
+
+    def stats(self) -> list:
+        """Return [(fingerprint, sessions, resident_bytes, mapped_bytes)] for every live index."""
+        with self.lock:
+            return [
+                (fingerprint, len(entry["sessions"]), entry["bytes"], entry["mapped_bytes"])
+                for fingerprint, entry in self.entries.items()
+            ]
@@ -0,0 +1,143 @@
+"""
+PDF text extraction workers for Campus Buddy.
+
+These functions live outside app.py so process-pool workers can import them:
+Streamlit executes app.py as a script, so functions defined there cannot be
+pickled into another process. The pool itself comes from process_pools, so
+its workers do not re-run app.py on start-up either. Documents are passed as
+file paths, so queued tasks never carry their own copy of the PDF bytes.
+"""
+
+import signal
+import threading
+
+from PyPDF2 import PdfReader
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+except ImportError:
+    pdfminer_extract_text = None
+
+
+def available_backend(preferred: str = None) -> str:
+    """
+    Pick the extraction backend: the preferred one if installed, else the fastest
+    available. pdfminer is the slowest of the three, so it is only a last resort.
+    """
+    installed = {
+        "pypdfium2": pdfium is not None,
+        "pypdf2": True,
+        "pdfminer": pdfminer_extract_text is not None,
+    }
+
+    if preferred and installed.get(preferred):
+        return preferred
+
+    for backend in ("pypdfium2", "pypdf2", "pdfminer"):
+        if installed[backend]:
+            return backend
+
+
+def count_pages(path: str, backend: str) -> int:
+    """Return the number of pages in a PDF."""
+    if backend == "pypdfium2":
+        document = pdfium.PdfDocument(path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    return len(PdfReader(path).pages)
+
+
+class PageTimeout(Exception):
+    """Raised when a single page takes longer than the per-page timeout."""
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def _open_document(path: str, backend: str):
+    if backend == "pypdfium2":
+        return pdfium.PdfDocument(path)
+    return PdfReader(path)
+
+
+def _extract_page(document, page_number: int, backend: str) -> str:
+    if backend == "pypdfium2":
+        page = document[page_number]
+        text_page = page.get_textpage()
+        try:
+            return text_page.get_text_range()
+        finally:
+            text_page.close()
+            page.close()
+
+    return document.pages[page_number].extract_text()
+
+
+def _extract_pdfminer_range(path: str, start: int, end: int, use_alarm: bool, page_timeout: float) -> list:
+    # One pass over the range: pdfminer re-parses the document on every call, and ends each page with \f
+    try:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, page_timeout * (end - start))
+        text = pdfminer_extract_text(path, page_numbers=range(start, end))
+    except Exception:
+        return [""] * (end - start)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    page_texts = text.split("\x0c")[:end - start]
+    return page_texts + [""] * (end - start - len(page_texts))
+
+
+def extract_page_range(path: str, start: int, end: int, backend: str, page_timeout: float = 0) -> list:
+    """
+    Extract pages [start, end) and return one string per page.
+    Pages that fail or exceed page_timeout seconds come back empty (pdfminer gets
+    the whole range's budget at once). SIGALRM cannot interrupt a single native
+    pypdfium2 call, so callers should also bound the task as a whole.
+    """
+    # SIGALRM is only usable from the main thread (true inside pool workers)
+    use_alarm = (
+        page_timeout > 0 and
+        hasattr(signal, "SIGALRM") and
+        threading.current_thread() is threading.main_thread()
+    )
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout) if use_alarm else None
+
+    if backend == "pdfminer":
+        try:
+            return _extract_pdfminer_range(path, start, end, use_alarm, page_timeout)
+        finally:
+            if use_alarm:
+                signal.signal(signal.SIGALRM, previous_handler)
+
+    document = _open_document(path, backend)
+    page_texts = []
+
+    try:
+        for page_number in range(start, end):
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                page_texts.append(_extract_page(document, page_number, backend) or "")
+            except Exception:
+                page_texts.append("")
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous_handler)
+        if backend == "pypdfium2":
+            document.close()
+
+    return page_texts
@@ -0,0 +1,52 @@
+"""
+Spawned worker processes that do not re-run the Streamlit script.
+
+A spawned child re-creates its parent's __main__ before it runs any task.
+Streamlit executes app.py in a stand-in __main__ whose __file__ is app.py and
+whose __spec__ is None, so multiprocessing re-runs the whole script in every
+worker (page config, the intro sleep and rerun, Groq and model setup).
+Naming an importable module as __main__'s spec while a worker starts makes
+the child import that module instead. This module is used, since it has no
+side effects.
+"""
+
+import importlib.util
+import sys
+import threading
+from contextlib import contextmanager
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+_main_lock = threading.Lock()
+
+
+@contextmanager
+def importable_main(module_name: str = __name__):
+    """Start processes inside this block with module_name as their __main__."""
+    main_module = sys.modules["__main__"]
+
+    with _main_lock:
+        saved_spec = getattr(main_module, "__spec__", None)
+        main_module.__spec__ = importlib.util.find_spec(module_name)
+        try:
+            yield
+        finally:
+            main_module.__spec__ = saved_spec
+
+
+class WorkerProcess(SpawnProcess):
+    """Spawned process that starts from importable_main()."""
+
+    def start(self):
+        with importable_main():
+            super().start()
+
+
+class WorkerSpawnContext(SpawnContext):
+    """Spawn context whose processes never re-run the Streamlit script, wherever they are started."""
+
+    Process = WorkerProcess
+
+
+def spawn_context() -> WorkerSpawnContext:
+    """mp_context for ProcessPoolExecutor; workers may be started lazily, from any thread."""
+    return WorkerSpawnContext()
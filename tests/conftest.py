@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text, so tests need no model."""
+
+    def __init__(self, dimension: int = 16):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> list:
+        seed = int.from_bytes(text.encode()[:8].ljust(8, b"\0"), "little") ^ len(text)
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._embed(text)
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
@@ -0,0 +1,30 @@
+import pytest
+
+from conversation import looks_like_follow_up
+
+
+@pytest.mark.parametrize("question", [
+    "and for MBA?",
+    "What about hostel fees?",
+    "or the library?",
+    "How much does it cost?",
+    "What is its deadline?",
+    "What does that mean?",
+    "Tell me more about it",
+    "When do they close?",
+])
+def test_follow_ups(question):
+    assert looks_like_follow_up(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Is there a library?",
+    "What is this year's fee?",
+    "What are the tuition fees for MBA?",
+    "Which courses are offered in the Computer Science department?",
+    "Is there a bus from the railway station to the campus?",
+    "Does that hostel block have wifi and laundry facilities?",
+    "How do I apply for a scholarship?",
+])
+def test_standalone_questions(question):
+    assert not looks_like_follow_up(question)
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from crawler import CrawlerHttpClient
+
+
+def response(etag: str):
+    return SimpleNamespace(headers={"ETag": etag})
+
+
+def page(chars: int) -> dict:
+    return {"title": "", "text": "x" * chars, "links": []}
+
+
+def test_cached_pages_are_bounded_by_size():
+    client = CrawlerHttpClient(max_page_chars=250)
+    for url in ("a", "b", "c"):
+        client.remember(url, response(url), page(100))
+
+    assert client.cached_page("a") is None
+    assert client.cached_page("b") is not None
+    assert client.page_chars == 200
+
+
+def test_replacing_a_page_releases_its_size():
+    client = CrawlerHttpClient(max_page_chars=250)
+    client.remember("a", response("1"), page(100))
+    client.remember("a", response("2"), page(50))
+
+    assert client.page_chars == 50
+    assert client.validators["a"]["etag"] == "2"
+
+
+def test_page_larger_than_the_limit_is_not_kept():
+    client = CrawlerHttpClient(max_page_chars=250)
+    client.remember("a", response("a"), page(100))
+    client.remember("huge", response("huge"), page(1000))
+
+    assert client.cached_page("huge") is None
+    assert client.cached_page("a") is not None
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from hybrid_store import HybridFAISS, clone_vector_store
+
+TEXTS = [
+    "The central library opens at 8 am on weekdays.",
+    "Tuition fees for B.Tech are 50,000 rupees per semester.",
+    "Course CS101 covers introductory programming in Python.",
+]
+
+RERUN_SCRIPT = """
+import sys
+sys.path.insert(0, {tests_dir!r})
+
+import streamlit as st
+from conftest import HashEmbeddings
+from hybrid_store import HybridFAISS, clone_vector_store
+
+embeddings = HashEmbeddings()
+if "store" not in st.session_state:
+    texts = ["library hours", "tuition fees", "course CS101"]
+    st.session_state.store = HybridFAISS.from_embeddings(list(zip(texts, embeddings.embed_documents(texts))), embeddings)
+else:
+    clone = clone_vector_store(st.session_state.store, embeddings)
+    st.text(f"{{isinstance(st.session_state.store, HybridFAISS)}} {{clone.lexical_index.search('CS101', 1)[0][0]}}")
+"""
+
+
+def build_store(embeddings) -> HybridFAISS:
+    return HybridFAISS.from_embeddings(list(zip(TEXTS, embeddings.embed_documents(TEXTS))), embeddings)
+
+
+def test_clone_is_independent(embeddings):
+    store = build_store(embeddings)
+    clone = clone_vector_store(store, embeddings)
+
+    clone.delete([clone.index_to_docstore_id[0]])
+
+    assert store.index.ntotal == 3
+    assert clone.index.ntotal == 2
+    assert len(store.lexical_index.search("library", 3)) == 1
+    assert clone.lexical_index.search("library", 3) == []
+
+
+def test_clone_after_rerun():
+    # Streamlit re-executes the script as a new __main__ on every rerun; a store built on
+    # the first run must still pass isinstance and pickle on the next one
+    app = AppTest.from_string(RERUN_SCRIPT.format(tests_dir=str(Path(__file__).resolve().parent)))
+    app.run()
+    app.run()
+
+    assert not app.exception
+    is_hybrid, doc_id = app.text[0].value.split()
+    assert is_hybrid == "True"
+    assert doc_id == app.session_state.store.index_to_docstore_id[2]
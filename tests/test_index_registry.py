@@ -0,0 +1,77 @@
+import pytest
+
+import hybrid_store
+from hybrid_store import HybridFAISS, IndexRegistry
+
+IDLE_SECONDS = 60
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(hybrid_store.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(embeddings):
+    texts = ["library hours", "tuition fees"]
+    return HybridFAISS.from_embeddings(list(zip(texts, embeddings.embed_documents(texts))), embeddings)
+
+
+def test_shared_between_sessions(clock, store):
+    registry = IndexRegistry(IDLE_SECONDS)
+    registry.acquire("corpus", "a", store, {"doc.pdf": {}})
+
+    shared, manifest = registry.acquire("corpus", "b")
+
+    assert shared is store
+    assert manifest == {"doc.pdf": {}}
+    assert registry.stats()[0][:2] == ("corpus", 2)
+
+
+def test_released_index_is_evicted_once_idle(clock, store):
+    registry = IndexRegistry(IDLE_SECONDS)
+    registry.acquire("corpus", "a", store)
+    registry.release("a")
+
+    # Unreferenced but not yet idle: still served
+    clock.now += IDLE_SECONDS / 2
+    assert registry.stats()[0][:2] == ("corpus", 0)
+
+    clock.now += IDLE_SECONDS
+    assert registry.acquire("corpus", "b") == (None, None)
+    assert registry.stats() == []
+
+
+def test_touch_keeps_index_alive(clock, store):
+    registry = IndexRegistry(IDLE_SECONDS)
+    registry.acquire("corpus", "a", store)
+
+    for _ in range(3):
+        clock.now += IDLE_SECONDS - 1
+        assert registry.touch("corpus", "a")
+
+    clock.now += IDLE_SECONDS + 1
+    assert not registry.touch("corpus", "a")
+    assert registry.stats() == []
+
+
+def test_only_a_miss_is_sized(clock, store, monkeypatch):
+    sized = []
+    monkeypatch.setattr(hybrid_store, "estimate_index_bytes", lambda vector_store: sized.append(1) or (1, 0))
+    registry = IndexRegistry(IDLE_SECONDS)
+
+    registry.acquire("corpus", "a", store)
+    registry.acquire("corpus", "a", store)
+    registry.acquire("corpus", "b", store)
+
+    assert len(sized) == 1
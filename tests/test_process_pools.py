@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+# Every execution of the script, including any re-run inside a spawned worker, logs its __name__
+SPAWN_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+
+with open({log!r}, "a") as f:
+    f.write(__name__ + "\\n")
+
+from concurrent.futures import ProcessPoolExecutor
+import streamlit as st
+from process_pools import spawn_context
+
+with ProcessPoolExecutor(max_workers=2, mp_context=spawn_context()) as pool:
+    st.text(" ".join(str(value) for value in pool.map(abs, [-1, -2, -3])))
+"""
+
+
+def test_workers_do_not_rerun_script(tmp_path):
+    log = tmp_path / "runs.log"
+    root = str(Path(__file__).resolve().parent.parent)
+
+    app = AppTest.from_string(SPAWN_SCRIPT.format(root=root, log=str(log)), default_timeout=60)
+    app.run()
+
+    assert not app.exception
+    assert app.text[0].value == "1 2 3"
+    assert log.read_text().split() == ["__main__"]
@@ -0,0 +1,111 @@
+"""
+FAISS index construction, sizing and loading for Campus Buddy.
+
+Kept free of Streamlit and LangChain so index types can be benchmarked on
+their own; app.py wraps these indexes in its FAISS vector stores.
+"""
+
+import os
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+INDEX_MMAP = os.getenv("INDEX_MMAP", "auto").lower()  # auto, always, never
+INDEX_MMAP_MIN_BYTES = int(os.getenv("INDEX_MMAP_MIN_MB", "64")) * 1024 * 1024
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto").lower()  # auto, flat, hnsw, ivf, ivfpq
+INDEX_IVF_MIN_CHUNKS = int(os.getenv("INDEX_IVF_MIN_CHUNKS", "20000"))
+INDEX_IVFPQ_MIN_CHUNKS = int(os.getenv("INDEX_IVFPQ_MIN_CHUNKS", "500000"))
+INDEX_IVF_NPROBE = int(os.getenv("INDEX_IVF_NPROBE", "16"))
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+INDEX_HNSW_EF_SEARCH = int(os.getenv("INDEX_HNSW_EF_SEARCH", "64"))
+INDEX_PQ_M = int(os.getenv("INDEX_PQ_M", "48"))
+
+
+def choose_index_type(chunk_count: int, index_type: str = INDEX_TYPE) -> str:
+    """
+    Resolve INDEX_TYPE for a corpus size. "auto" stays exact (flat) for small corpora
+    and moves to IVF, then IVF-PQ, as chunk counts grow. HNSW is only used when asked
+    for explicitly.
+    """
+    if index_type != "auto":
+        return index_type
+    if chunk_count >= INDEX_IVFPQ_MIN_CHUNKS:
+        return "ivfpq"
+    if chunk_count >= INDEX_IVF_MIN_CHUNKS:
+        return "ivf"
+    return "flat"
+
+
+def build_ann_index(vectors: np.ndarray, index_type: str):
+    """Build a trained FAISS index of the given type over vectors (L2 metric, like IndexFlatL2)."""
+    count, dimension = vectors.shape
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, INDEX_HNSW_M)
+        index.hnsw.efSearch = INDEX_HNSW_EF_SEARCH
+    elif index_type in ("ivf", "ivfpq"):
+        # ~4·sqrt(n) lists, keeping at least 39 training points per centroid
+        nlist = max(1, min(int(4 * np.sqrt(count)), count // 39))
+        quantizer = faiss.IndexFlatL2(dimension)
+
+        # PQ needs 256 training points per sub-quantizer and m dividing the dimension
+        pq_m = next((m for m in (INDEX_PQ_M, 64, 48, 32, 16, 8) if dimension % m == 0), None)
+        if index_type == "ivfpq" and pq_m and count >= 256:
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, 8)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+
+        index.train(vectors)
+        index.nprobe = min(INDEX_IVF_NPROBE, nlist)
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    index.add(vectors)
+    return index
+
+
+def supports_removal(index) -> bool:
+    """
+    Whether vectors can be deleted in place. FAISS.delete renumbers index_to_docstore_id
+    to match a flat index compacting its rows, but IVF lists keep their original ids
+    and HNSW cannot delete at all, so any ANN index is rebuilt instead of updated.
+    """
+    return isinstance(index, faiss.IndexFlat)
+
+
+def use_index_mmap(index_path: Path) -> bool:
+    """Whether an on-disk index should be memory-mapped rather than read into memory."""
+    if INDEX_MMAP == "always":
+        return True
+    return INDEX_MMAP == "auto" and index_path.stat().st_size >= INDEX_MMAP_MIN_BYTES
+
+
+def read_faiss_index(index_path: Path):
+    """
+    Read a FAISS index file, memory-mapped when use_index_mmap allows it.
+    Mapped indexes are read-only and their pages are shared by every worker process
+    through the OS page cache.
+    """
+    if not use_index_mmap(index_path):
+        return faiss.read_index(str(index_path))
+
+    # IO_FLAG_MMAP_IFC (newer FAISS) maps flat codes and inverted lists alike; combining it
+    # with IO_FLAG_MMAP fails on IVF indexes. Older FAISS can only map inverted lists.
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(str(index_path), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+
+
+def faiss_index_bytes(index) -> int:
+    """Approximate size of a FAISS index from its vector count and code size, without copying it."""
+    index = faiss.downcast_index(index)
+
+    if isinstance(index, faiss.IndexHNSW):
+        # Stored vectors plus the int32 neighbour lists of every level
+        return faiss_index_bytes(index.storage) + index.hnsw.neighbors.size() * 4
+    if isinstance(index, faiss.IndexIVF):
+        # Codes and int64 ids per vector, the coarse centroids and any PQ codebooks
+        codebooks = index.pq.centroids.size() * 4 if hasattr(index, "pq") else 0
+        return index.ntotal * (index.code_size + 8) + faiss_index_bytes(index.quantizer) + codebooks
+
+    return index.ntotal * getattr(index, "code_size", index.d * 4)